@@ -0,0 +1,104 @@
+"""
+Content-addressed cache for /analyze/image results.
+Identical image bytes analyzed with the same Gemini model and prompt version reuse the
+stored analysis text, OCR text, comments and analytics instead of re-running Gemini and
+the local models. An in-process LRU sits in front of an optional table in the app database.
+"""
+import os
+import json
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, Any
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import SQLAlchemyError
+from models import AnalysisCacheEntry
+from gemini_wrapper import GEMINI_VISION_MODEL, ANALYSIS_PROMPT_VERSION
+from imaging import VISION_MAX_EDGE, VISION_FORMAT, VISION_QUALITY, VISION_PIPELINE_VERSION
+from util import content_hash
+
+ANALYSIS_CACHE_SIZE = int(os.getenv("ANALYSIS_CACHE_SIZE", "256"))
+ANALYSIS_CACHE_PERSIST = os.getenv("ANALYSIS_CACHE_PERSIST", "false").lower() in ("1", "true", "yes")
+
+
+class LRUCache:
+    """Small thread-safe LRU mapping keys to values"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._data: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key: str, value: Any) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+_memory_cache = LRUCache(ANALYSIS_CACHE_SIZE)
+
+
+def analysis_cache_key(image_bytes: bytes, mime_type: str, mode: str) -> str:
+    """
+    Cache key for an image: hash of the bytes plus everything that changes the analysis output.
+    mode names the prompts that produced the result ("combined" or "separate"), since the
+    combined prompt and the separate analysis + OCR prompts give different output.
+    """
+    version = f"{GEMINI_VISION_MODEL}:{ANALYSIS_PROMPT_VERSION}:{mode}:{mime_type}:{VISION_PIPELINE_VERSION}:{VISION_MAX_EDGE}:{VISION_FORMAT}:{VISION_QUALITY}"
+    return content_hash(version.encode() + b"\0" + content_hash(image_bytes).encode())
+
+
+async def get_cached_analysis(key: str, db: Optional[AsyncSession] = None) -> Optional[Dict[str, Any]]:
+    """
+    Look up a cached analysis result, checking memory first and then the database tier.
+    """
+    cached = _memory_cache.get(key)
+    if cached is not None:
+        return cached
+
+    if db is None or not ANALYSIS_CACHE_PERSIST:
+        return None
+
+    try:
+        entry = await db.get(AnalysisCacheEntry, key)
+    except SQLAlchemyError as e:
+        print(f"Analysis cache lookup failed: {e}")
+        return None
+    if entry is None:
+        return None
+
+    cached = json.loads(entry.payload)
+    _memory_cache.set(key, cached)
+    return cached
+
+
+async def store_analysis(key: str, result: Dict[str, Any], db: Optional[AsyncSession] = None) -> None:
+    """
+    Store a successful analysis result in memory and, if enabled, in the database.
+    """
+    _memory_cache.set(key, result)
+
+    if db is None or not ANALYSIS_CACHE_PERSIST:
+        return
+
+    try:
+        await db.merge(AnalysisCacheEntry(cache_key=key, payload=json.dumps(result)))
+        await db.commit()
+    except SQLAlchemyError as e:
+        # A concurrent request may have stored the same key first; the cache is best-effort
+        await db.rollback()
+        print(f"Analysis cache store failed: {e}")
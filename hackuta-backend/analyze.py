@@ -1,44 +1,209 @@
 from fastapi import UploadFile, File
-from typing import Dict, Any
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple
+from dataclasses import dataclass
+from sqlalchemy.ext.asyncio import AsyncSession
+import copy
 import random
 import os
 import asyncio
-import easyocr
-from gemini_wrapper import gemini_ocr
+from gemini_wrapper import gemini_ocr, run_gemini_call, stream_gemini_call, stream_ad_image_analysis
 import emoji
-import joblib
 from textblob import TextBlob
-from transformers import AutoTokenizer, AutoModel, pipeline
-import torch
 import numpy as np
 import pandas as pd
-from gemini_wrapper import analyze_ad_image_with_gemini
+from gemini_wrapper import analyze_ad_image_with_gemini, analyze_ad_image_combined
+from analysis_cache import analysis_cache_key, get_cached_analysis, store_analysis
+from inference import get_inference, INFERENCE_MAX_BATCH, INFERENCE_MAX_WAIT_MS
+from batching import MicroBatcher
+from imaging import prepare_for_vision
 
-# Load models
-tokenizer = AutoTokenizer.from_pretrained("sentence-transformers/all-MiniLM-L6-v2")
-embed_model = AutoModel.from_pretrained("sentence-transformers/all-MiniLM-L6-v2")
-toxicity_model = pipeline("text-classification", model="unitary/toxic-bert")
-comment_sentiment_model = joblib.load("../ml/saved_models/comment_sentiment_model.pkl")
-ad_receptive_model = joblib.load("../ml/saved_models/ad_receptiveness_model.pkl")
+# Ask Gemini for critique + OCR + comments in one structured request (falls back to two calls on failure)
+GEMINI_COMBINED_ANALYSIS = os.getenv("GEMINI_COMBINED_ANALYSIS", "true").lower() in ("1", "true", "yes")
+# Prompt sets, part of the analysis cache key (the streaming path uses the separate prompts)
+COMBINED_MODE = "combined"
+SEPARATE_MODE = "separate"
 
-def get_features(text):
-    tokens = tokenizer(text, return_tensors="pt", truncation=True, padding=True)
-    with torch.no_grad():
-        output = embed_model(**tokens)
-    emb = output.last_hidden_state.mean(dim=1).squeeze().numpy()
 
-    sentiment_polarity = TextBlob(text).sentiment.polarity
-    emoji_count = len(emoji.emoji_list(text))
-    question_flag = int("?" in text)
-    toxicity = toxicity_model(text)[0]["score"]
+# Concurrent requests' texts are merged into shared model batches (see batching.py)
+_embed_batcher = MicroBatcher(lambda texts: get_inference().embed(texts), INFERENCE_MAX_BATCH, INFERENCE_MAX_WAIT_MS)
+_toxicity_batcher = MicroBatcher(lambda texts: get_inference().toxicity(texts), INFERENCE_MAX_BATCH, INFERENCE_MAX_WAIT_MS)
 
-    return np.concatenate([emb, [sentiment_polarity, emoji_count, question_flag, toxicity]])
+
+async def embed_texts(texts):
+    """
+    Mean-pooled MiniLM embeddings for a list of texts, shape (len(texts), 384).
+    Served from the shared embedding cache; only unseen texts hit the model, batched with
+    other in-flight requests.
+    """
+    return await _embed_batcher.submit(texts)
+
+
+async def score_toxicity(texts):
+    """Top-label toxic-bert score for each text, batched with other in-flight requests"""
+    return await _toxicity_batcher.submit(texts)
+
+
+async def run_inference(fn, *args):
+    """Run a small, unbatched model call (the sklearn heads) off the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, fn, *args)
+
+
+@dataclass
+class CommentFeatures:
+    """Per-comment features computed once and shared by scoring and analytics"""
+    text: str
+    embedding: np.ndarray
+    polarity: float
+    emoji_count: int
+    question_flag: int
+    toxicity: float
+
+    def vector(self) -> np.ndarray:
+        """Feature vector in the layout the comment sentiment model was trained on"""
+        return np.concatenate([self.embedding, [self.polarity, self.emoji_count, self.question_flag, self.toxicity]])
+
+
+async def extract_comment_features(texts) -> List[CommentFeatures]:
+    """
+    Compute features for every comment; embeddings and toxicity are scored concurrently.
+    """
+    texts = list(texts)
+    if not texts:
+        return []
+    embeddings, toxicity = await asyncio.gather(embed_texts(texts), score_toxicity(texts))
+    return [
+        CommentFeatures(
+            text=text,
+            embedding=emb,
+            polarity=TextBlob(text).sentiment.polarity,
+            emoji_count=len(emoji.emoji_list(text)),
+            question_flag=int("?" in text),
+            toxicity=float(tox),
+        )
+        for text, emb, tox in zip(texts, embeddings, toxicity)
+    ]
+
+
+async def score_comments(features: List[CommentFeatures]):
+    """
+    Score all comments for an ad with a single predict_proba call.
+    Returns a list of {"comment", "score", "toxicity"} dicts where score = p_pos - p_neg.
+    """
+    if not features:
+        return []
+    X = np.vstack([f.vector() for f in features])
+    proba = await run_inference(get_inference().comment_proba, X)  # rows of [p_neg, p_neu, p_pos]
+    scores = proba[:, 2] - proba[:, 0]  # positive minus negative
+    return [
+        {"comment": f.text, "score": float(score), "toxicity": f.toxicity}
+        for f, score in zip(features, scores)
+    ]
+
+
+def parse_ocr_text(cor_text: str):
+    """
+    Split gemini_ocr output into (extracted_text, generated_comments).
+    """
+    lines = cor_text.split("\n")
+
+    # Split into sections
+    split_index = lines.index("Generated Comments:") if "Generated Comments:" in lines else len(lines)
+    extracted_text = " ".join(line for line in lines[:split_index] if line.strip())
+    comments = [line.split(". ", 1)[1] for line in lines[split_index + 1:] if line.strip() and line[0].isdigit()]
+    return extracted_text, comments
+
+
+async def get_analyze_image(image: UploadFile = File(...), db: Optional[AsyncSession] = None) -> Dict[str, Any]:
+    """
+    Analyze an uploaded image file. See analyze_image_bytes.
+    """
+    image_bytes = await image.read()
+    return await analyze_image_bytes(image_bytes, image.content_type or "image/png", db)
+
+
+async def run_local_models(ad_text: str, ad_comments: List[str]):
+    """
+    Score the generated comments and derive the ad analytics with the local models.
+    Returns (comment_results, analytics).
+    """
+    # 1. Predict sentiment for all comments in one batch
+    # (the ad text embedding for step 2 rides along in the same embedding batch)
+    comment_features, ad_embeddings = await asyncio.gather(
+        extract_comment_features(ad_comments),
+        embed_texts([ad_text]),
+    )
+    comment_results = await score_comments(comment_features)
+
+    comment_df = pd.DataFrame(comment_results)
+    mean_sentiment = comment_df["score"].mean()
+    receptiveness_index = (mean_sentiment + 1) / 2  # normalize to [0, 1]
+
+    print("=== Comment Predictions ===")
+    print(comment_df)
+    print("\nMean Sentiment:", round(mean_sentiment, 3))
+    print("Receptiveness Index:", round(receptiveness_index, 3))
+
+    # 2. Predict ad-level receptiveness using ad text + mean sentiment
+    ad_emb = ad_embeddings[0]
+    X = np.hstack([ad_emb, [mean_sentiment]]).reshape(1, -1)
+    predicted_receptiveness = (await run_inference(get_inference().ad_receptiveness, X))[0]
+
+    print("\nPredicted Ad Receptiveness (regression output):", round(predicted_receptiveness, 3))
+
+    # Aggregate toxicity per comment (reuses the scores computed for the features)
+    avg_toxicity = np.mean([f.toxicity for f in comment_features]) if comment_features else 0.0
+
+    # Derive metrics
+    analytics = {
+        # Sentiment magnitude: high = positive, low = polarizing or unclear
+        "quality": round(abs(mean_sentiment), 3),
+
+        # Hostility directly tied to toxicity
+        "hostility": round(avg_toxicity, 3),
+
+        # Engagement: how emotionally charged the comments are
+        "engagement": round(min(1.0, abs(mean_sentiment) + 0.3 * (1 - avg_toxicity)), 3),
+
+        # Resonance: how much the ad connects — predicted from your regression model
+        "resonance": round(max(0.0, min(1.0, predicted_receptiveness)), 3),
+    }
+
+    print("ANALYTICSL: ", analytics)
+    return comment_results, analytics
+
+
+def _result_suffix(result: Dict[str, Any]) -> str:
+    """OCR result appended to the critique in analysis_text"""
+    return f"\n\n{str(result)}"
 
 
-async def get_analyze_image(image: UploadFile = File(...)) -> Dict[str, Any]:
+def build_analysis_response(analysis_text: str, result: Dict[str, Any], analytics: Dict[str, Any], comment_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Result dictionary shared by analyze_image_bytes and stream_image_analysis"""
+    return {
+        "analysis_text": analysis_text + _result_suffix(result),
+        "analytics": analytics,
+        "comments": comment_results,
+        "extracted_text": result["extracted_text"],
+        "generated_comments": result["generated_comments"],
+    }
+
+
+def critique_from_response(response: Dict[str, Any]) -> str:
+    """The bare critique of a build_analysis_response dictionary, without the appended OCR result"""
+    suffix = _result_suffix({
+        "extracted_text": response["extracted_text"],
+        "generated_comments": response["generated_comments"],
+    })
+    text = response["analysis_text"]
+    return text[:-len(suffix)] if text.endswith(suffix) else text
+
+
+async def analyze_image_bytes(image_bytes: bytes, mime_type: str = "image/png", db: Optional[AsyncSession] = None) -> Dict[str, Any]:
     """
-    Analyze the uploaded image using Gemini Vision API + LangChain.
+    Analyze image bytes using Gemini Vision API + LangChain.
     Returns structured results including analysis text and analytics metrics.
+    Results are cached by image hash (see analysis_cache.py); pass db to use the persistent tier.
     """
     analytics = {
         "quality": 0,
@@ -51,25 +216,46 @@ async def get_analyze_image(image: UploadFile = File(...)) -> Dict[str, Any]:
         "extracted_text": "",
         "generated_comments": "comments"
     }
+    comment_results = []
+    cache_key = None
+    succeeded = False
 
     # Always attempt Gemini first; fall back to mock on failure
     try:
-        # Read image bytes
-        image_bytes = await image.read()
-
-        # Analyze with Gemini (simplified: returns analysis_text directly)
-        loop = asyncio.get_event_loop()
-        gemini_result = await loop.run_in_executor(None, analyze_ad_image_with_gemini, image_bytes, image.content_type or "image/png")
-        analysis_text = gemini_result.get('analysis_text', '[AI_ERROR] No text returned')
-        cor_text = gemini_ocr(image_bytes, mime_type=image.content_type or "image/png")["ocr_text"]
-
-        # Split into lines
-        lines = cor_text.split("\n")
-
-        # Split into sections
-        split_index = lines.index("Generated Comments:") if "Generated Comments:" in lines else len(lines)
-        extracted_text = " ".join(line for line in lines[:split_index] if line.strip())
-        comments = [line.split(". ", 1)[1] for line in lines[split_index + 1:] if line.strip() and line[0].isdigit()]
+        # Identical bytes analyzed before: skip Gemini and all local inference
+        original_bytes, original_mime_type = image_bytes, mime_type
+        cache_key = analysis_cache_key(image_bytes, mime_type, COMBINED_MODE if GEMINI_COMBINED_ANALYSIS else SEPARATE_MODE)
+        cached = await get_cached_analysis(cache_key, db)
+        if cached is not None:
+            print("Analysis cache hit:", cache_key[:12])
+            return copy.deepcopy(cached)
+
+        # Decode once and send the same downscaled payload to every Gemini call
+        loop = asyncio.get_running_loop()
+        image_bytes, mime_type = await loop.run_in_executor(None, prepare_for_vision, image_bytes, mime_type)
+
+        # Preferred path: critique, OCR text and comments from a single Gemini request
+        gemini_result = None
+        if GEMINI_COMBINED_ANALYSIS:
+            gemini_result = await run_gemini_call(analyze_ad_image_combined, image_bytes, mime_type)
+            if gemini_result['analysis_text'].startswith("[AI_ERROR]"):
+                print("Combined Gemini analysis failed, falling back to separate analysis + OCR calls")
+                gemini_result = None
+
+        if gemini_result is not None:
+            analysis_text = gemini_result['analysis_text']
+            extracted_text = gemini_result['extracted_text']
+            comments = gemini_result['generated_comments']
+        else:
+            # Fallback: separate analysis and OCR requests, issued concurrently
+            cache_key = analysis_cache_key(original_bytes, original_mime_type, SEPARATE_MODE)
+            gemini_result, ocr_result = await asyncio.gather(
+                run_gemini_call(analyze_ad_image_with_gemini, image_bytes, mime_type),
+                run_gemini_call(gemini_ocr, image_bytes, mime_type=mime_type),
+            )
+            analysis_text = gemini_result.get('analysis_text', '[AI_ERROR] No text returned')
+            cor_text = ocr_result["ocr_text"]
+            extracted_text, comments = parse_ocr_text(cor_text)
 
         result = {
             "extracted_text": extracted_text,
@@ -78,75 +264,94 @@ async def get_analyze_image(image: UploadFile = File(...)) -> Dict[str, Any]:
         
         ad_text = result["extracted_text"].strip()
         ad_comments = [c.strip() for c in result["generated_comments"] if c.strip()]
-
-        # 1. Predict sentiment for each comment
-        comment_results = []
-        for comment in ad_comments:
-            features = get_features(comment).reshape(1, -1)
-            proba = comment_sentiment_model.predict_proba(features)[0]  # [p_neg, p_neu, p_pos]
-            score = proba[2] - proba[0]  # positive minus negative
-            comment_results.append({"comment": comment, "score": score})
-
-        comment_df = pd.DataFrame(comment_results)
-        mean_sentiment = comment_df["score"].mean()
-        receptiveness_index = (mean_sentiment + 1) / 2  # normalize to [0, 1]
-
-        print("=== Comment Predictions ===")
-        print(comment_df)
-        print("\nMean Sentiment:", round(mean_sentiment, 3))
-        print("Receptiveness Index:", round(receptiveness_index, 3))
-
-        # 2. Predict ad-level receptiveness using ad text + mean sentiment
-        def get_embedding(text):
-            tokens = tokenizer(text, return_tensors="pt", truncation=True, padding=True)
-            with torch.no_grad():
-                out = embed_model(**tokens)
-            return out.last_hidden_state.mean(dim=1).squeeze().numpy()
-
-        ad_emb = get_embedding(ad_text)
-        X = np.hstack([ad_emb, [mean_sentiment]]).reshape(1, -1)
-        predicted_receptiveness = ad_receptive_model.predict(X)[0]
-
-        print("\nPredicted Ad Receptiveness (regression output):", round(predicted_receptiveness, 3))
-
-        # Aggregate toxicity per comment (from get_features)
-        avg_toxicity = np.mean([
-            toxicity_model(c)[0]["score"] for c in ad_comments
-        ]) if ad_comments else 0.0
-
-        # Derive metrics
-        analytics = {
-            # Sentiment magnitude: high = positive, low = polarizing or unclear
-            "quality": round(abs(mean_sentiment), 3),
-
-            # Hostility directly tied to toxicity
-            "hostility": round(avg_toxicity, 3),
-
-            # Engagement: how emotionally charged the comments are
-            "engagement": round(min(1.0, abs(mean_sentiment) + 0.3 * (1 - avg_toxicity)), 3),
-
-            # Resonance: how much the ad connects — predicted from your regression model
-            "resonance": round(max(0.0, min(1.0, predicted_receptiveness)), 3),
-        }
-
-        print("ANALYTICSL: ", analytics)
-                
-        
+        comment_results, analytics = await run_local_models(ad_text, ad_comments)
+        succeeded = not analysis_text.startswith("[AI_ERROR]")
 
     except Exception as e:
         # Do NOT return mock content. Mark analysis as an error so frontend can handle it explicitly.
         print(f"Gemini analysis failed: {str(e)}")
         analysis_text = f"[AI_ERROR] {str(e)}"
 
+    response = build_analysis_response(analysis_text, result, analytics, comment_results)
 
+    if succeeded:
+        await store_analysis(cache_key, copy.deepcopy(response), db)
 
-
-    return {
-        "analysis_text": analysis_text + str(f"\n\n{str(result)}"),
-        "analytics": analytics,
-    }
-
+    return response
 
 
+async def stream_image_analysis(image_bytes: bytes, mime_type: str = "image/png", db: Optional[AsyncSession] = None) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Streaming variant of analyze_image_bytes. Yields (event, data) pairs as each stage finishes:
+    critique_delta (text chunks while Gemini writes the critique), critique, ocr, comments,
+    analytics and finally result, the same dictionary analyze_image_bytes returns.
+    The critique is streamed from its own Gemini request while OCR runs alongside it.
+    """
+    cache_key = analysis_cache_key(image_bytes, mime_type, SEPARATE_MODE)
+    cached = await get_cached_analysis(cache_key, db)
+    if cached is None:
+        # Results from /analyze/image (combined prompt) are just as good a replay
+        cached = await get_cached_analysis(analysis_cache_key(image_bytes, mime_type, COMBINED_MODE), db)
+    if cached is not None:
+        print("Analysis cache hit:", cache_key[:12])
+        cached = copy.deepcopy(cached)
+        yield "critique", {"analysis_text": critique_from_response(cached)}
+        yield "ocr", {"extracted_text": cached["extracted_text"], "generated_comments": cached["generated_comments"]}
+        yield "comments", cached["comments"]
+        yield "analytics", cached["analytics"]
+        yield "result", cached
+        return
 
+    analytics = {
+        "quality": 0,
+        "hostility": 0,
+        "engagement": 0,
+        "resonance": 0,
+    }
+    result = {
+        "extracted_text": "",
+        "generated_comments": []
+    }
+    comment_results = []
 
+    loop = asyncio.get_running_loop()
+    image_bytes, mime_type = await loop.run_in_executor(None, prepare_for_vision, image_bytes, mime_type)
+    ocr_task = asyncio.create_task(run_gemini_call(gemini_ocr, image_bytes, mime_type=mime_type))
+    critique_stream = stream_gemini_call(stream_ad_image_analysis, image_bytes, mime_type)
+    try:
+        chunks = []
+        try:
+            async for chunk in critique_stream:
+                chunks.append(chunk)
+                yield "critique_delta", {"text": chunk}
+            analysis_text = "".join(chunks).strip() or "[AI_ERROR] Empty response from Gemini"
+        except Exception as e:
+            print(f"Error streaming analysis from Gemini: {str(e)}")
+            analysis_text = f"[AI_ERROR] {str(e)}"
+        yield "critique", {"analysis_text": analysis_text}
+
+        extracted_text, comments = parse_ocr_text((await ocr_task)["ocr_text"])
+        result = {
+            "extracted_text": extracted_text,
+            "generated_comments": comments
+        }
+        yield "ocr", result
+
+        try:
+            ad_comments = [c.strip() for c in comments if c.strip()]
+            comment_results, analytics = await run_local_models(extracted_text.strip(), ad_comments)
+            yield "comments", comment_results
+            yield "analytics", analytics
+        except Exception as e:
+            print(f"Gemini analysis failed: {str(e)}")
+            analysis_text = f"[AI_ERROR] {str(e)}"
+    finally:
+        # Client went away mid-stream: stop reading the critique stream (freeing its Gemini
+        # thread) and don't leave the OCR request running unobserved
+        ocr_task.cancel()
+        await critique_stream.aclose()
+
+    response = build_analysis_response(analysis_text, result, analytics, comment_results)
+    if not analysis_text.startswith("[AI_ERROR]"):
+        await store_analysis(cache_key, copy.deepcopy(response), db)
+    yield "result", response
@@ -1,28 +1,38 @@
-from fastapi import FastAPI, Depends, HTTPException, UploadFile, File, Request, Response
-from fastapi.responses import RedirectResponse, JSONResponse
+from fastapi import FastAPI, Depends, HTTPException, UploadFile, File, Form, Query, Request, Response
+from fastapi.responses import RedirectResponse, JSONResponse, StreamingResponse
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
 from pydantic import BaseModel
-from typing import Annotated, List
+from typing import Annotated, List, Literal, Optional, Union
 from sqlalchemy import create_engine, Column, Integer, String, ForeignKey, select
-from sqlalchemy.orm import sessionmaker, relationship, declarative_base, selectinload
+from sqlalchemy.orm import sessionmaker, relationship, declarative_base, selectinload, lazyload, defer
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from dotenv import load_dotenv
-from analyze import get_analyze_image
-from util import upload_image
+from analyze import analyze_image_bytes, stream_image_analysis
+from inference import get_inference
+from util import upload_image_async, download_image_async, content_hash, presign_urls, discard_upload
+from imaging import schedule_derivatives
+from pagination import paginate, next_cursor, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER
+from jobs import submit_analysis_job, get_job_status, job_queue_full, job_owner_columns, start_job_workers, stop_job_workers, JobQueueFull
+from io import BytesIO
+import asyncio
+import json
 import os
 
 # Import our new modules
-from database import get_db, init_db
+from database import get_db, init_db, AsyncSessionLocal
 from models import User, Image, Campaign
-from schemas import ImageCreateRequest, ImageResponse, UserResponse, AnalyzeImageResponse, Analytics, CampaignCreate, CampaignResponse
+from schemas import ImageCreateRequest, ImageResponse, UserResponse, AnalyzeImageResponse, Analytics, CampaignCreate, CampaignResponse, AnalysisJobResponse, BulkAnalyzeResponse, ImageSummaryResponse, CampaignSummaryResponse
 from oauth import oauth
+from auth import close_jwks_session
 from session import (
     set_session_cookie, 
     clear_session_cookie, 
     get_session_user,
-    get_current_user_from_session
+    get_current_user_from_session,
+    invalidate_cached_user,
 )
 
 load_dotenv()
@@ -41,19 +51,91 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 
+S3_BUCKET_NAME = os.getenv("S3_BUCKET_NAME", "your-default-bucket-name")
+
+
+def sign_image_urls(images) -> None:
+    """
+    Fill in fresh presigned URLs for images stored in our bucket (rows with an s3_key),
+    plus thumbnail_url/preview_url once their derivatives exist.
+    Signing is local and cached, so this stays cheap for long listings. The url value is
+    set as already-committed so it is never written back to the database.
+    """
+    images = [image for image in images if image.s3_key]
+    if not images:
+        return
+    keys = [key for image in images for key in (image.s3_key, image.thumbnail_key, image.preview_key) if key]
+    urls = presign_urls(S3_BUCKET_NAME, keys)
+    for image in images:
+        set_committed_value(image, "url", urls[image.s3_key])
+        image.thumbnail_url = urls.get(image.thumbnail_key)
+        image.preview_url = urls.get(image.preview_key)
+
+
+# Bulk campaign analysis: images analyzed at once per request, and files accepted per request
+BULK_ANALYSIS_CONCURRENCY = int(os.getenv("BULK_ANALYSIS_CONCURRENCY", "8"))
+BULK_ANALYSIS_MAX_FILES = int(os.getenv("BULK_ANALYSIS_MAX_FILES", "100"))
+
+
+# Load local inference models in the background at startup instead of at import time
+MODEL_WARMUP = os.getenv("MODEL_WARMUP", "true").lower() in ("1", "true", "yes")
+
+
 # Initialize database on startup
 @app.on_event("startup")
 async def startup_event():
     await init_db()
+    if MODEL_WARMUP:
+        app.state.model_warmup = asyncio.create_task(get_inference().warm_up())
+    # The job heartbeat also re-queues analysis jobs left behind by stopped processes
+    start_job_workers(S3_BUCKET_NAME)
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await stop_job_workers()
+    await close_jwks_session()
 
 @app.get("/")
 async def hello_world():
     return {"message": "Hello World - HackUTA Image Analysis API"}
 
 
+@app.get("/health")
+async def health():
+    """
+    Liveness + model readiness. Always 200 once the API is up; models_ready tells
+    whether /analyze requests will be served without waiting for a model load.
+    """
+    inference = get_inference()
+    loop = asyncio.get_running_loop()
+    models = await loop.run_in_executor(None, inference.status)
+    return {
+        "status": "ok",
+        "models_ready": all(model.get("state") == "loaded" for model in models.values()),
+        "models": models,
+    }
+
+
+@app.get("/health/ready")
+async def health_ready():
+    """
+    Readiness probe: 503 until every local inference model is loaded
+    """
+    inference = get_inference()
+    loop = asyncio.get_running_loop()
+    models = await loop.run_in_executor(None, inference.status)
+    ready = all(model.get("state") == "loaded" for model in models.values())
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"ready": ready, "models": models},
+    )
+
+
 # ============================================================================
 # AUTHENTICATION ENDPOINTS (OAuth2 with Auth0)
 # ============================================================================
@@ -107,6 +189,8 @@ async def auth_callback(request: Request, response: Response, db: AsyncSession =
             user.email = email
             user.name = name
             await db.commit()
+        # Cached lookups for this user must see the upserted row
+        invalidate_cached_user(user_id)
         
         # Clear OAuth session data (no longer needed)
         request.session.clear()
@@ -211,22 +295,38 @@ async def create_image(
     
     return image
 
-@app.get("/images", response_model=List[ImageResponse])
+def set_next_cursor(response: Response, cursor: Optional[str]) -> None:
+    """Put the next page cursor (if any) in the X-Next-Cursor header"""
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
+
+
+@app.get("/images", response_model=Union[List[ImageResponse], List[ImageSummaryResponse]])
 async def get_user_images(
     request: Request,
-    db: AsyncSession = Depends(get_db)
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Literal["full", "summary"] = "full",
 ):
     """
-    Get all images for the current user
+    Get the current user's images, newest first, one page at a time.
+    Pass the X-Next-Cursor header of a response as ?cursor= to get the next page.
+    fields=summary leaves out analysis_text (it is not even read from the database).
     """
     # Get current user from session
     current_user = await get_current_user_from_session(request, db)
     
-    result = await db.execute(
-        select(Image).where(Image.user_id == current_user.id).order_by(Image.created_at.desc())
-    )
-    images = result.scalars().all()
-    return images
+    query = select(Image).where(Image.user_id == current_user.id)
+    if fields == "summary":
+        query = query.options(defer(Image.analysis_text))
+    result = await db.execute(paginate(query, Image, cursor, limit))
+    images, cursor = next_cursor(result.scalars().all(), limit)
+    sign_image_urls(images)
+    set_next_cursor(response, cursor)
+    schema = ImageSummaryResponse if fields == "summary" else ImageResponse
+    return [schema.model_validate(image) for image in images]
 
 @app.get("/images/{image_id}", response_model=ImageResponse)
 async def get_image(
@@ -251,6 +351,7 @@ async def get_image(
     if not image:
         raise HTTPException(status_code=404, detail="Image not found")
     
+    sign_image_urls([image])
     return image
 
 
@@ -307,9 +408,19 @@ async def update_image_filename(
     image.filename = payload.filename
     await db.commit()
     await db.refresh(image)
+    sign_image_urls([image])
     return image
 
 
+async def analyze_in_own_session(image_bytes: bytes, content_type: str):
+    """
+    Run analyze_image_bytes with a dedicated session for the analysis cache, which commits
+    its writes; the request session stays free for the upload path and the Image insert.
+    """
+    async with AsyncSessionLocal() as cache_db:
+        return await analyze_image_bytes(image_bytes, content_type, cache_db)
+
+
 @app.post("/analyze/image", response_model=AnalyzeImageResponse)
 async def analyze_image(
     request: Request,
@@ -327,34 +438,28 @@ async def analyze_image(
     if not image.content_type or not image.content_type.startswith("image/"):
         raise HTTPException(status_code=400, detail="File must be an image")
     
-    # Read image bytes once (before any processing)
+    # Starlette has already spooled the body once (memory, then disk for large files).
+    # Read it into a single bytes object for Gemini; S3 streams from the spooled file itself.
     image_bytes = await image.read()
+    digest = content_hash(image_bytes)
+    
+    # Analyze the image while it uploads to S3 (the upload is off the critical path)
+    analysis_task = asyncio.create_task(analyze_in_own_session(image_bytes, image.content_type))
     
-    # Upload image directly to S3
-    bucket_name = os.getenv("S3_BUCKET_NAME", "your-default-bucket-name")
     try:
-        from io import BytesIO
-        image_info = upload_image(
-            file_obj=BytesIO(image_bytes),
-            bucket=bucket_name,
+        await image.seek(0)
+        image_info = await upload_image_async(
+            file_obj=image.file,
+            bucket=S3_BUCKET_NAME,
             filename=image.filename or "image",
             content_type=image.content_type,
+            digest=digest,
         )
     except RuntimeError as e:
+        analysis_task.cancel()
         raise HTTPException(status_code=500, detail=f"Failed to upload image: {str(e)}")
     
-    # Create a temporary UploadFile-like object for analysis
-    from io import BytesIO
-    from fastapi import UploadFile
-    temp_file = BytesIO(image_bytes)
-    temp_upload = UploadFile(
-        file=temp_file,
-        filename=image.filename,
-        headers={"content-type": image.content_type}
-    )
-    
-    # Analyze the image
-    analysis_result = await get_analyze_image(temp_upload)
+    analysis_result = await analysis_task
     analyze_text = analysis_result.get("analysis_text", "")
     # If Gemini failed, propagate a clean error marker rather than mock text
     if analyze_text.startswith("[AI_ERROR]"):
@@ -364,9 +469,12 @@ async def analyze_image(
     # Create image record in database
     image_record = Image(
         url=image_info['url'],
+        s3_key=image_info['key'],
         filename=image.filename,
         content_type=image.content_type,
+        content_hash=digest,
         analysis_text=analyze_text,
+        analysis_status="failed" if analyze_text.startswith("[AI_ERROR]") else "done",
         user_id=current_user.id,
         campaign_id=campaign_id
     )
@@ -375,6 +483,9 @@ async def analyze_image(
     await db.commit()
     await db.refresh(image_record)
     
+    # Thumbnails are produced in the background and show up on later listings
+    schedule_derivatives(image_record.id, image_bytes, S3_BUCKET_NAME, image_info['key'])
+    
     # Prepare analytics object for response
     analytics = Analytics(
         quality=float(analytics_dict.get("quality", 0.0)),
@@ -386,9 +497,315 @@ async def analyze_image(
     return {
         "image": image_record,
         "analytics": analytics,
+        "comments": analysis_result.get("comments", []),
     }
 
 
+def sse_event(event: str, data) -> str:
+    """Format one server-sent event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.post("/analyze/image/stream")
+async def analyze_image_stream(
+    request: Request,
+    campaign_id: int,
+    image: UploadFile = File(...),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Streaming variant of /analyze/image. Responds with text/event-stream and emits:
+    critique_delta (critique text as Gemini writes it), critique, ocr, comments, analytics,
+    upload (whenever the S3 upload finishes), then image (the saved record) - or error if a stage fails.
+    """
+    current_user = await get_current_user_from_session(request, db)
+    
+    if not image.content_type or not image.content_type.startswith("image/"):
+        raise HTTPException(status_code=400, detail="File must be an image")
+    
+    image_bytes = await image.read()
+    digest = content_hash(image_bytes)
+    filename = image.filename
+    content_type = image.content_type
+    user_id = current_user.id
+    
+    async def events():
+        # The request's session and upload file may be closed once streaming starts,
+        # so the stream works from the bytes read above and its own session
+        async with AsyncSessionLocal() as stream_db:
+            upload_task = asyncio.create_task(upload_image_async(
+                file_obj=BytesIO(image_bytes),
+                bucket=S3_BUCKET_NAME,
+                filename=filename or "image",
+                content_type=content_type,
+                digest=digest,
+            ))
+            analysis = stream_image_analysis(image_bytes, content_type, stream_db)
+            saved = False
+            try:
+                # The upload runs alongside the analysis; its event goes out as soon as it finishes
+                analysis_result = None
+                upload_reported = False
+                try:
+                    async for event, data in analysis:
+                        if not upload_reported and upload_task.done():
+                            upload_reported = True
+                            if upload_task.exception() is None:
+                                yield sse_event("upload", {"key": upload_task.result()["key"]})
+                        if event == "result":
+                            analysis_result = data
+                        else:
+                            yield sse_event(event, data)
+                except Exception as e:
+                    yield sse_event("error", {"stage": "analysis", "detail": str(e)})
+                    return
+                
+                try:
+                    image_info = await upload_task
+                except RuntimeError as e:
+                    yield sse_event("error", {"stage": "upload", "detail": f"Failed to upload image: {str(e)}"})
+                    return
+                if not upload_reported:
+                    yield sse_event("upload", {"key": image_info["key"]})
+                
+                analyze_text = analysis_result.get("analysis_text", "")
+                if analyze_text.startswith("[AI_ERROR]"):
+                    analyze_text = "[AI_ERROR] Analysis failed"
+                image_record = Image(
+                    url=image_info['url'],
+                    s3_key=image_info['key'],
+                    filename=filename,
+                    content_type=content_type,
+                    content_hash=digest,
+                    analysis_text=analyze_text,
+                    analysis_status="failed" if analyze_text.startswith("[AI_ERROR]") else "done",
+                    user_id=user_id,
+                    campaign_id=campaign_id
+                )
+                stream_db.add(image_record)
+                await stream_db.commit()
+                saved = True
+                await stream_db.refresh(image_record)
+                
+                schedule_derivatives(image_record.id, image_bytes, S3_BUCKET_NAME, image_info['key'])
+                yield sse_event("image", ImageResponse.model_validate(image_record).model_dump(mode="json"))
+            finally:
+                # Client disconnected or a stage failed before the record was saved:
+                # stop the analysis now and don't leave an orphaned upload behind
+                if not saved:
+                    discard_upload(upload_task, S3_BUCKET_NAME)
+                await analysis.aclose()
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Disable proxy buffering so events reach the client as they are produced
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/analyze/jobs", response_model=AnalysisJobResponse, status_code=202)
+async def create_analysis_job(
+    request: Request,
+    campaign_id: int,
+    image: UploadFile = File(...),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Upload an image and queue its analysis. Returns a job id immediately;
+    poll GET /analyze/jobs/{job_id} for the result, which is also written to the image record.
+    Returns 503 while the job queue is full.
+    """
+    current_user = await get_current_user_from_session(request, db)
+    
+    if not image.content_type or not image.content_type.startswith("image/"):
+        raise HTTPException(status_code=400, detail="File must be an image")
+    if await job_queue_full():
+        raise HTTPException(status_code=503, detail="Analysis queue is full, try again later", headers={"Retry-After": "30"})
+    
+    image_bytes = await image.read()
+    digest = content_hash(image_bytes)
+    try:
+        await image.seek(0)
+        image_info = await upload_image_async(
+            file_obj=image.file,
+            bucket=S3_BUCKET_NAME,
+            filename=image.filename or "image",
+            content_type=image.content_type,
+            digest=digest,
+        )
+    except RuntimeError as e:
+        raise HTTPException(status_code=500, detail=f"Failed to upload image: {str(e)}")
+    
+    image_record = Image(
+        url=image_info['url'],
+        s3_key=image_info['key'],
+        filename=image.filename,
+        content_type=image.content_type,
+        content_hash=digest,
+        analysis_status="queued",
+        **job_owner_columns(),
+        user_id=current_user.id,
+        campaign_id=campaign_id
+    )
+    db.add(image_record)
+    await db.commit()
+    await db.refresh(image_record)
+    
+    schedule_derivatives(image_record.id, image_bytes, S3_BUCKET_NAME, image_info['key'])
+    try:
+        job_id = await submit_analysis_job(
+            image_record.id, current_user.id, S3_BUCKET_NAME, image_info['key'], image.content_type, image_bytes
+        )
+    except JobQueueFull:
+        # Filled up while this upload was being stored
+        image_record.analysis_status = "failed"
+        await db.commit()
+        raise HTTPException(status_code=503, detail="Analysis queue is full, try again later", headers={"Retry-After": "30"})
+    return {"job_id": job_id, "status": "queued", "image_id": image_record.id}
+
+
+@app.get("/analyze/jobs/{job_id}", response_model=AnalysisJobResponse)
+async def get_analysis_job(
+    job_id: str,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Status of a background analysis job (queued, running, done or failed)
+    """
+    current_user = await get_current_user_from_session(request, db)
+    job = await get_job_status(job_id)
+    if job is None or job.get("user_id") != current_user.id:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {"job_id": job_id, **job}
+
+
+
+
+@app.post("/campaigns/{campaign_id}/analyze", response_model=BulkAnalyzeResponse)
+async def analyze_campaign_images(
+    campaign_id: int,
+    request: Request,
+    images: List[UploadFile] = File(default=[]),
+    s3_keys: List[str] = Form(default=[]),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Analyze many creatives for one campaign in a single request.
+    Accepts uploaded files and/or S3 keys of the user's existing images. Uploads and analyses
+    run in parallel (at most BULK_ANALYSIS_CONCURRENCY at a time, sharing the local model
+    batches), and all new image records are inserted in one transaction.
+    """
+    current_user = await get_current_user_from_session(request, db)
+    
+    result = await db.execute(select(Campaign).where(Campaign.id == campaign_id))
+    campaign = result.scalar_one_or_none()
+    if not campaign:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    if campaign.user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized to add images to this campaign")
+    
+    if not images and not s3_keys:
+        raise HTTPException(status_code=400, detail="No images provided")
+    if len(images) + len(s3_keys) > BULK_ANALYSIS_MAX_FILES:
+        raise HTTPException(status_code=400, detail=f"At most {BULK_ANALYSIS_MAX_FILES} images per request")
+    for image in images:
+        if not image.content_type or not image.content_type.startswith("image/"):
+            raise HTTPException(status_code=400, detail=f"{image.filename or 'File'} must be an image")
+    
+    # Keys may only point at objects the user already uploaded
+    existing = {}
+    if s3_keys:
+        result = await db.execute(
+            select(Image).where(Image.user_id == current_user.id, Image.s3_key.in_(s3_keys))
+        )
+        existing = {image.s3_key: image for image in result.scalars().all()}
+        missing = [key for key in s3_keys if key not in existing]
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Unknown image keys: {', '.join(missing)}")
+    
+    semaphore = asyncio.Semaphore(BULK_ANALYSIS_CONCURRENCY)
+    
+    async def process_upload(image: UploadFile):
+        async with semaphore:
+            image_bytes = await image.read()
+            digest = content_hash(image_bytes)
+            await image.seek(0)
+            upload_task = asyncio.create_task(upload_image_async(
+                file_obj=image.file,
+                bucket=S3_BUCKET_NAME,
+                filename=image.filename or "image",
+                content_type=image.content_type,
+                digest=digest,
+            ))
+            analysis_result = await analyze_in_own_session(image_bytes, image.content_type)
+            image_info = await upload_task
+            return image.filename, image.content_type, digest, image_info, image_bytes, analysis_result
+    
+    async def process_key(key: str):
+        source = existing[key]
+        async with semaphore:
+            image_bytes = (await download_image_async(S3_BUCKET_NAME, key)).getvalue()
+            analysis_result = await analyze_in_own_session(image_bytes, source.content_type or "image/png")
+            # The new row shares the stored object, so it also shares its derivatives; if the
+            # source has none yet, the downloaded bytes are used to generate them
+            image_info = {"key": key, "url": source.url, "thumbnail_key": source.thumbnail_key, "preview_key": source.preview_key}
+            derivative_bytes = image_bytes if not (source.thumbnail_key and source.preview_key) else None
+            return source.filename, source.content_type, source.content_hash, image_info, derivative_bytes, analysis_result
+    
+    sources = [image.filename for image in images] + list(s3_keys)
+    outcomes = await asyncio.gather(
+        *[process_upload(image) for image in images],
+        *[process_key(key) for key in s3_keys],
+        return_exceptions=True,
+    )
+    
+    records = []
+    errors = []
+    for source, outcome in zip(sources, outcomes):
+        if isinstance(outcome, Exception):
+            errors.append({"filename": source, "detail": str(outcome)})
+            continue
+        filename, content_type, digest, image_info, image_bytes, analysis_result = outcome
+        analyze_text = analysis_result.get("analysis_text", "")
+        if analyze_text.startswith("[AI_ERROR]"):
+            analyze_text = "[AI_ERROR] Analysis failed"
+        image_record = Image(
+            url=image_info['url'],
+            s3_key=image_info['key'],
+            thumbnail_key=image_info.get('thumbnail_key'),
+            preview_key=image_info.get('preview_key'),
+            filename=filename,
+            content_type=content_type,
+            content_hash=digest,
+            analysis_text=analyze_text,
+            analysis_status="failed" if analyze_text.startswith("[AI_ERROR]") else "done",
+            user_id=current_user.id,
+            campaign_id=campaign_id
+        )
+        records.append((image_record, image_bytes, analysis_result))
+    
+    db.add_all([record for record, _, _ in records])
+    await db.commit()
+    
+    results = []
+    for image_record, image_bytes, analysis_result in records:
+        if image_bytes is not None:
+            schedule_derivatives(image_record.id, image_bytes, S3_BUCKET_NAME, image_record.s3_key)
+        analytics_dict = analysis_result.get("analytics", {})
+        results.append({
+            "image": image_record,
+            "analytics": Analytics(
+                quality=float(analytics_dict.get("quality", 0.0)),
+                hostility=float(analytics_dict.get("hostility", 0.0)),
+                engagement=float(analytics_dict.get("engagement", 0.0)),
+                resonance=float(analytics_dict.get("resonance", 0.0)),
+            ),
+            "comments": analysis_result.get("comments", []),
+        })
+    sign_image_urls([image_record for image_record, _, _ in records])
+    return {"results": results, "errors": errors}
 
 
 @app.post("/campaigns", response_model=CampaignResponse)
@@ -415,18 +832,38 @@ async def create_campaign(
     return campaign
 
 
-@app.get("/campaigns", response_model=List[CampaignResponse])
+@app.get("/campaigns", response_model=Union[List[CampaignResponse], List[CampaignSummaryResponse]])
 async def list_campaigns(
     request: Request,
+    response: Response,
     db: AsyncSession = Depends(get_db),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    include_images: bool = False,
+    fields: Literal["full", "summary"] = "full",
 ):
     """
-    List campaigns for the current user
+    List campaigns for the current user, newest first, one page at a time (see GET /images).
+    Images are only loaded with include_images=true; fields=summary omits their analysis_text.
     """
     current_user = await get_current_user_from_session(request, db)
-    result = await db.execute(select(Campaign).where(Campaign.user_id == current_user.id).options(selectinload(Campaign.images)).order_by(Campaign.created_at.desc()))
-    campaigns = result.scalars().all()
-    return campaigns
+    query = select(Campaign).where(Campaign.user_id == current_user.id)
+    if not include_images:
+        query = query.options(lazyload(Campaign.images))
+    elif fields == "summary":
+        query = query.options(selectinload(Campaign.images).defer(Image.analysis_text))
+    else:
+        query = query.options(selectinload(Campaign.images))
+    result = await db.execute(paginate(query, Campaign, cursor, limit))
+    campaigns, cursor = next_cursor(result.scalars().all(), limit)
+    if not include_images:
+        # Serialize as an empty list without triggering the lazy load
+        for campaign in campaigns:
+            set_committed_value(campaign, "images", [])
+    sign_image_urls([image for campaign in campaigns for image in campaign.images])
+    set_next_cursor(response, cursor)
+    schema = CampaignSummaryResponse if fields == "summary" else CampaignResponse
+    return [schema.model_validate(campaign) for campaign in campaigns]
 
 @app.delete("/campaigns/{campaign_id}")
 async def delete_campaign(
@@ -2,6 +2,8 @@
 JWT authentication utilities for Auth0-style tokens
 """
 import os
+import time
+import asyncio
 from typing import Optional
 from jose import JWTError, jwt
 from fastapi import HTTPException, Depends, status
@@ -19,44 +21,132 @@ AUTH0_ALGORITHMS = ["RS256"]
 # Security scheme
 security = HTTPBearer()
 
-# Cache for JWKS (JSON Web Key Set)
+# JWKS (JSON Web Key Set) endpoint and cache settings
+JWKS_URL = os.getenv("JWKS_URL") or f"https://{AUTH0_DOMAIN}/.well-known/jwks.json"
+JWKS_CACHE_TTL = int(os.getenv("JWKS_CACHE_TTL", "3600"))  # seconds before keys are refreshed in the background
+JWKS_MIN_REFRESH_INTERVAL = int(os.getenv("JWKS_MIN_REFRESH_INTERVAL", "30"))  # floor between unknown-kid refetches
+JWKS_FETCH_TIMEOUT = float(os.getenv("JWKS_FETCH_TIMEOUT", "5"))
+
+# Cache of kid -> constructed signing key, refreshed in place
 jwks_cache = {}
+_jwks_fetched_at = 0.0
+_jwks_lock = None
+_jwks_refresh_task = None
+_http_session = None
+
+
+def _get_lock() -> asyncio.Lock:
+    global _jwks_lock
+    if _jwks_lock is None:
+        _jwks_lock = asyncio.Lock()
+    return _jwks_lock
+
+
+async def _get_http_session():
+    """Shared aiohttp session for JWKS fetches"""
+    import aiohttp
+    global _http_session
+    if _http_session is None or _http_session.closed:
+        _http_session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=JWKS_FETCH_TIMEOUT))
+    return _http_session
+
+
+async def close_jwks_session():
+    """Close the shared JWKS HTTP session (call on shutdown)"""
+    global _http_session
+    if _http_session is not None and not _http_session.closed:
+        await _http_session.close()
+    _http_session = None
+
 
-async def get_jwks():
+def build_key_map(jwks: dict) -> dict:
     """
-    Fetch and cache JWKS from Auth0
+    Construct a verification key for every RSA signing key in a JWKS document
+
+    Args:
+        jwks: JWKS document ({"keys": [...]})
+
+    Returns:
+        Dict of kid -> constructed key
+    """
+    from jose import jwk
+
+    keys = {}
+    for key in jwks.get("keys", []):
+        if key.get("kty") != "RSA" or key.get("use", "sig") != "sig" or "kid" not in key:
+            continue
+        try:
+            keys[key["kid"]] = jwk.construct(key, key.get("alg") or AUTH0_ALGORITHMS[0])
+        except Exception as e:
+            print(f"Skipping JWKS key {key.get('kid')}: {e}")
+    return keys
+
+
+def _jwks_age() -> float:
+    return time.monotonic() - _jwks_fetched_at
+
+
+async def refresh_jwks(min_age: float = 0) -> dict:
+    """
+    Fetch the JWKS and swap in a new key map. Concurrent callers share one fetch: whoever
+    waits on the lock re-checks the age and returns the keys the first caller just loaded.
+    If the fetch fails, the previous keys stay in use.
+    """
+    global _jwks_fetched_at
+    async with _get_lock():
+        if jwks_cache and _jwks_age() < min_age:
+            return jwks_cache
+        try:
+            session = await _get_http_session()
+            async with session.get(JWKS_URL) as response:
+                response.raise_for_status()
+                keys = build_key_map(await response.json())
+        except Exception as e:
+            print(f"JWKS refresh from {JWKS_URL} failed: {e}")
+            if not jwks_cache:
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Unable to fetch signing keys"
+                )
+            # Keep serving the old keys and retry after JWKS_MIN_REFRESH_INTERVAL, not on every request
+            _jwks_fetched_at = time.monotonic() - max(JWKS_CACHE_TTL - JWKS_MIN_REFRESH_INTERVAL, 0)
+            return jwks_cache
+        jwks_cache.clear()
+        jwks_cache.update(keys)
+        _jwks_fetched_at = time.monotonic()
+        return jwks_cache
+
+
+def _refresh_in_background():
+    global _jwks_refresh_task
+    if _jwks_refresh_task is None or _jwks_refresh_task.done():
+        _jwks_refresh_task = asyncio.create_task(refresh_jwks(min_age=JWKS_CACHE_TTL))
+
+
+async def get_jwks() -> dict:
+    """
+    Return the cached kid -> key map. The first call fetches it; once older than JWKS_CACHE_TTL
+    the stale keys keep being served while a single background task refreshes them.
     """
-    import aiohttp
     if not jwks_cache:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f"https://{AUTH0_DOMAIN}/.well-known/jwks.json") as response:
-                jwks_cache.update(await response.json())
+        return await refresh_jwks(min_age=JWKS_CACHE_TTL)
+    if _jwks_age() >= JWKS_CACHE_TTL:
+        _refresh_in_background()
     return jwks_cache
 
-def get_rsa_key(token: str, jwks: dict):
+
+async def get_signing_key(kid: str):
     """
-    Get RSA key for token verification
+    Look up the key for a kid, refetching the JWKS once if the kid is unknown (key rotation).
+    Refetches are at most every JWKS_MIN_REFRESH_INTERVAL seconds so made-up kids cannot
+    hammer the JWKS endpoint.
     """
-    from jose import jwk
-    from jose.utils import base64url_decode
-    
-    unverified_header = jwt.get_unverified_header(token)
-    rsa_key = {}
-    
-    for key in jwks["keys"]:
-        if key["kid"] == unverified_header["kid"]:
-            rsa_key = {
-                "kty": key["kty"],
-                "kid": key["kid"],
-                "use": key["use"],
-                "n": key["n"],
-                "e": key["e"]
-            }
-            break
-    
-    if rsa_key:
-        return jwk.construct(rsa_key)
-    return None
+    keys = await get_jwks()
+    if kid in keys:
+        return keys[kid]
+    keys = await refresh_jwks(min_age=JWKS_MIN_REFRESH_INTERVAL)
+    return keys.get(kid)
+
 
 async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
     """
@@ -65,11 +155,9 @@ async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(secur
     token = credentials.credentials
     
     try:
-        # Get JWKS
-        jwks = await get_jwks()
-        
-        # Get RSA key
-        rsa_key = get_rsa_key(token, jwks)
+        # Get RSA key for the token's kid
+        kid = jwt.get_unverified_header(token).get("kid")
+        rsa_key = await get_signing_key(kid) if kid else None
         if not rsa_key:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
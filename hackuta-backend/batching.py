@@ -0,0 +1,102 @@
+"""
+Asyncio micro-batching for local inference.
+
+Concurrent /analyze requests each need a handful of embeddings and toxicity scores.
+MicroBatcher collects the texts submitted by all waiting coroutines for up to
+max_wait_ms (or until max_batch_size items are queued), runs them as one model call
+on a worker thread, and hands each coroutine back its own rows. If a merged call
+fails, its requests are retried separately so one bad input only fails its own caller.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Sequence, Tuple
+
+import numpy as np
+
+
+class MicroBatcher:
+    """
+    Merges concurrent submit() calls into batched calls of fn.
+    fn takes a list of items and returns an array whose first dimension matches it.
+    At most one batch runs at a time; requests arriving meanwhile form the next batch.
+    """
+
+    def __init__(self, fn: Callable[[List[Any]], Any], max_batch_size: int = 64, max_wait_ms: float = 5.0):
+        self.fn = fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._pending: List[Tuple[List[Any], asyncio.Future]] = []
+        self._pending_size = 0
+        self._timer = None
+        self._running = False
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="microbatch")
+
+    async def submit(self, items: Sequence[Any]) -> np.ndarray:
+        """Queue items for the next batch and wait for their results"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        items = list(items)
+        self._pending.append((items, future))
+        self._pending_size += len(items)
+
+        if self._pending_size >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None and not self._running:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._running or not self._pending:
+            return
+
+        # Take whole requests up to max_batch_size items (always at least one request)
+        batch = [self._pending.pop(0)]
+        size = len(batch[0][0])
+        while self._pending and size + len(self._pending[0][0]) <= self.max_batch_size:
+            request = self._pending.pop(0)
+            batch.append(request)
+            size += len(request[0])
+        self._pending_size -= size
+
+        self._running = True
+        asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch: List[Tuple[List[Any], asyncio.Future]]) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            merged = [item for items, _ in batch for item in items]
+            results = np.asarray(await loop.run_in_executor(self._executor, self.fn, merged))
+            offset = 0
+            for items, future in batch:
+                if not future.done():
+                    future.set_result(results[offset:offset + len(items)])
+                offset += len(items)
+        except Exception as e:
+            if len(batch) == 1:
+                if not batch[0][1].done():
+                    batch[0][1].set_exception(e)
+            else:
+                await self._run_separately(batch)
+        finally:
+            self._running = False
+            # Requests that queued up while this batch ran have already waited; send them now
+            if self._pending:
+                self._flush()
+
+    async def _run_separately(self, batch: List[Tuple[List[Any], asyncio.Future]]) -> None:
+        """Retry each request of a failed batch on its own, so only the failing ones get the error"""
+        loop = asyncio.get_running_loop()
+        for items, future in batch:
+            if future.done():
+                continue
+            try:
+                result = np.asarray(await loop.run_in_executor(self._executor, self.fn, items))
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+                continue
+            if not future.done():
+                future.set_result(result)
@@ -2,6 +2,8 @@
 Database configuration and session management
 """
 import os
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
 from dotenv import load_dotenv
@@ -16,13 +18,75 @@ DATABASE_URL = os.getenv(
     "sqlite+aiosqlite:///./hackuta.db"
 )
 
+def _env_flag(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() in ("1", "true", "yes")
+
+
+# Engine settings. SQL echo is off unless asked for: logging every statement is slow.
+DB_ECHO = _env_flag("DB_ECHO", "false")
+DB_QUERY_CACHE_SIZE = int(os.getenv("DB_QUERY_CACHE_SIZE", "1000"))  # compiled SQL cache entries
+
+# Connection pool (server databases such as PostgreSQL/asyncpg)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # seconds; below typical server/proxy idle timeouts
+DB_POOL_PRE_PING = _env_flag("DB_POOL_PRE_PING", "true")
+# asyncpg prepared statements cached per connection; set 0 behind pgbouncer in transaction mode
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "500"))
+
+# SQLite (aiosqlite) pragmas applied to every new connection
+SQLITE_WAL = _env_flag("SQLITE_WAL", "true")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")  # NORMAL is safe with WAL
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "20000"))
+
+
+def create_engine_from_env(database_url: str = DATABASE_URL):
+    """
+    Async engine configured for the database in database_url: pooling, pre-ping,
+    recycling and prepared statement caching for server databases; WAL and pragmas for SQLite.
+    """
+    url = make_url(database_url)
+    options = {
+        "echo": DB_ECHO,
+        "future": True,
+        "query_cache_size": DB_QUERY_CACHE_SIZE,
+    }
+
+    if url.get_backend_name() == "sqlite":
+        options["connect_args"] = {"check_same_thread": False}
+    else:
+        options.update(
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_pre_ping=DB_POOL_PRE_PING,
+        )
+        if url.get_driver_name() == "asyncpg" and "prepared_statement_cache_size" not in url.query:
+            url = url.update_query_dict({"prepared_statement_cache_size": str(DB_STATEMENT_CACHE_SIZE)})
+
+    new_engine = create_async_engine(url, **options)
+
+    if url.get_backend_name() == "sqlite":
+        @event.listens_for(new_engine.sync_engine, "connect")
+        def _set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            if SQLITE_WAL:
+                # WAL lets readers run while a write is in progress
+                cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+            cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+            cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+            cursor.execute("PRAGMA temp_store=MEMORY")
+            cursor.close()
+
+    return new_engine
+
+
 # Create async engine
-engine = create_async_engine(
-    DATABASE_URL,
-    echo=True,  # Set to False in production
-    future=True,
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
-)
+engine = create_engine_from_env()
 
 # Create async session factory
 AsyncSessionLocal = async_sessionmaker(
@@ -41,10 +105,36 @@ async def get_db() -> AsyncSession:
         finally:
             await session.close()
 
+# Apply Alembic migrations on startup. Turn off when several processes share one database
+# and migrations are run once per deploy instead (alembic upgrade head).
+DB_AUTO_MIGRATE = os.getenv("DB_AUTO_MIGRATE", "true").lower() in ("1", "true", "yes")
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic.ini")
+BASELINE_REVISION = "0001"
+
+
+def run_migrations(connection):
+    """
+    Upgrade the database to the latest Alembic revision on an existing (sync) connection.
+    Databases created by the old create_all() have tables but no alembic_version;
+    they are stamped at the baseline first so only the newer migrations run.
+    """
+    from alembic import command
+    from alembic.config import Config
+    from sqlalchemy import inspect
+
+    config = Config(ALEMBIC_INI)
+    config.attributes["connection"] = connection
+    inspector = inspect(connection)
+    if inspector.has_table("users") and not inspector.has_table("alembic_version"):
+        command.stamp(config, BASELINE_REVISION)
+    command.upgrade(config, "head")
+
+
 async def init_db():
     """
-    Initialize database tables
+    Initialize database tables by running migrations
     """
-    from models import Base
+    if not DB_AUTO_MIGRATE:
+        return
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(run_migrations)
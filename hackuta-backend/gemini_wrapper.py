@@ -5,7 +5,11 @@ Provides initial criticism and insights for uploaded advertisement images.
 
 import os
 import base64
-from typing import Dict, Any
+import asyncio
+import threading
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterator, List, TypedDict
 
 import google.generativeai as genai
 from langchain_google_genai import ChatGoogleGenerativeAI  # still used by follow-up utils
@@ -13,6 +17,66 @@ from langchain.prompts import PromptTemplate  # still used by follow-up utils
 from langchain.chains import LLMChain  # still used by follow-up utils
 import json
 
+# Vision model used for ad analysis/OCR. Bump ANALYSIS_PROMPT_VERSION whenever a vision prompt
+# changes so cached analysis results (see analysis_cache.py) are not reused across prompt versions.
+GEMINI_VISION_MODEL = os.getenv("GEMINI_VISION_MODEL", "gemini-flash-latest")
+ANALYSIS_PROMPT_VERSION = "1"
+
+# Upper bound on in-flight outbound Gemini requests per process; extra calls queue for a free thread
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "8"))
+_gemini_executor = ThreadPoolExecutor(max_workers=GEMINI_MAX_CONCURRENCY, thread_name_prefix="gemini")
+
+
+async def run_gemini_call(func, *args, **kwargs):
+    """
+    Run a blocking Gemini helper on the dedicated, bounded Gemini thread pool
+    so it never blocks the event loop or the default executor.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_gemini_executor, functools.partial(func, *args, **kwargs))
+
+
+async def stream_gemini_call(func, *args, **kwargs):
+    """
+    Async iterator over the items of a blocking generator helper (e.g. streamed text chunks).
+    The generator is consumed on the Gemini thread pool and each item is handed to the
+    event loop as soon as it arrives. If the iterator is closed early (e.g. the client went
+    away), the generator is closed at its next item so the Gemini thread is freed.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    done = object()
+    stop = threading.Event()
+
+    def consume():
+        items = None
+        try:
+            items = func(*args, **kwargs)
+            for item in items:
+                if stop.is_set():
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, e)
+        finally:
+            if hasattr(items, "close"):
+                items.close()
+            if not stop.is_set():
+                loop.call_soon_threadsafe(queue.put_nowait, done)
+
+    future = loop.run_in_executor(_gemini_executor, consume)
+    try:
+        while True:
+            item = await queue.get()
+            if item is done:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+        await future
+    finally:
+        stop.set()
+
 
 def initialize_gemini():
     """Initialize Gemini API with API key from environment."""
@@ -23,6 +87,41 @@ def initialize_gemini():
     return api_key
 
 
+# Layout of the critique, shared by the separate and combined analysis prompts
+ANALYSIS_FORMAT = (
+    "Initial Insight: [1-2 sentences about what this ad accomplishes]\n\n"
+    "Strengths:\n"
+    "- [Strength 1]\n"
+    "- [Strength 2]\n"
+    "- [Strength 3]\n\n"
+    "Weaknesses:\n"
+    "- [Weakness 1]\n"
+    "- [Weakness 2]\n"
+    "- [Weakness 3]\n\n"
+    "Suggested Improvements:\n"
+    "1. [Improvement 1]\n"
+    "2. [Improvement 2]\n"
+    "3. [Improvement 3]"
+)
+
+ANALYSIS_FORMAT_PROMPT = (
+    "You are an AI advertising analyst. Analyze the provided image and return the output EXACTLY in this format with exact line breaks.\n\n"
+    + ANALYSIS_FORMAT
+)
+
+COMBINED_ANALYSIS_PROMPT = (
+    "You are an AI advertising analyst and social media simulator. Analyze the provided advertisement image "
+    "and return a JSON object with these fields:\n\n"
+    "analysis_text: a critique formatted EXACTLY like this, with exact line breaks:\n"
+    + ANALYSIS_FORMAT
+    + "\n\n"
+    "extracted_text: all readable text detected in the image. Preserve punctuation and casing.\n\n"
+    "generated_comments: 5 realistic, human-like social media comments reacting to the ad. "
+    "Each comment should reflect natural social media behavior — mix of positive, neutral, and negative tones, "
+    "and reference details from the extracted text when possible."
+)
+
+
 def analyze_ad_image_with_gemini(image_bytes: bytes, mime_type: str = "image/png") -> Dict[str, Any]:
     """
     Analyze an advertisement image using Gemini Vision API with LangChain.
@@ -45,27 +144,10 @@ def analyze_ad_image_with_gemini(image_bytes: bytes, mime_type: str = "image/png
         image_data = image_bytes
 
         # Create Gemini model for vision (Flash) and ask for final formatted text directly
-        vision_model = genai.GenerativeModel('gemini-flash-latest')
-
-        format_prompt = (
-            "You are an AI advertising analyst. Analyze the provided image and return the output EXACTLY in this format with exact line breaks.\n\n"
-            "Initial Insight: [1-2 sentences about what this ad accomplishes]\n\n"
-            "Strengths:\n"
-            "- [Strength 1]\n"
-            "- [Strength 2]\n"
-            "- [Strength 3]\n\n"
-            "Weaknesses:\n"
-            "- [Weakness 1]\n"
-            "- [Weakness 2]\n"
-            "- [Weakness 3]\n\n"
-            "Suggested Improvements:\n"
-            "1. [Improvement 1]\n"
-            "2. [Improvement 2]\n"
-            "3. [Improvement 3]"
-        )
+        vision_model = genai.GenerativeModel(GEMINI_VISION_MODEL)
 
         image_part = {"mime_type": mime_type or "image/png", "data": image_data}
-        response = vision_model.generate_content([format_prompt, image_part])
+        response = vision_model.generate_content([ANALYSIS_FORMAT_PROMPT, image_part])
         text = (response.text or "").strip()
         if not text:
             raise ValueError("Empty response from Gemini")
@@ -79,6 +161,21 @@ def analyze_ad_image_with_gemini(image_bytes: bytes, mime_type: str = "image/png
 
 
 
+def stream_ad_image_analysis(image_bytes: bytes, mime_type: str = "image/png") -> Iterator[str]:
+    """
+    Same critique as analyze_ad_image_with_gemini, yielded as text chunks while Gemini generates it.
+    Errors are raised to the caller (use stream_gemini_call to consume it from async code).
+    """
+    initialize_gemini()
+    vision_model = genai.GenerativeModel(GEMINI_VISION_MODEL)
+    image_part = {"mime_type": mime_type or "image/png", "data": image_bytes}
+    response = vision_model.generate_content([ANALYSIS_FORMAT_PROMPT, image_part], stream=True)
+    for chunk in response:
+        text = chunk.text if chunk.parts else ""
+        if text:
+            yield text
+
+
 def gemini_ocr(image_bytes: bytes, mime_type: str = "image/png") -> Dict[str, Any]:
     """
     Analyze an advertisement image using Gemini Vision API with LangChain.
@@ -101,7 +198,7 @@ def gemini_ocr(image_bytes: bytes, mime_type: str = "image/png") -> Dict[str, An
         image_data = image_bytes
 
         # Create Gemini model for vision (Flash) and ask for final formatted text directly
-        vision_model = genai.GenerativeModel('gemini-flash-latest')
+        vision_model = genai.GenerativeModel(GEMINI_VISION_MODEL)
 
         format_prompt = (
             "You are an AI social media simulator. Your task is to extract visible text from the provided advertisement image, "
@@ -134,6 +231,62 @@ def gemini_ocr(image_bytes: bytes, mime_type: str = "image/png") -> Dict[str, An
         return { 'ocr_text': f"[AI_ERROR] {str(e)}" }
 
 
+class CombinedAdAnalysis(TypedDict):
+    """JSON schema for the single-request critique + OCR + comments response"""
+    analysis_text: str
+    extracted_text: str
+    generated_comments: List[str]
+
+
+def analyze_ad_image_combined(image_bytes: bytes, mime_type: str = "image/png") -> Dict[str, Any]:
+    """
+    Critique, OCR and synthetic comments for an ad image in one Gemini vision request.
+
+    Uses JSON schema output so the three parts come back as separate fields instead of
+    two free-text responses from analyze_ad_image_with_gemini and gemini_ocr.
+
+    Returns:
+        Dictionary containing:
+        - analysis_text: Critique in the same format as analyze_ad_image_with_gemini
+        - extracted_text: All readable text in the image
+        - generated_comments: List of synthetic social media comments
+    """
+    try:
+        initialize_gemini()
+
+        vision_model = genai.GenerativeModel(GEMINI_VISION_MODEL)
+
+        image_part = {"mime_type": mime_type or "image/png", "data": image_bytes}
+        response = vision_model.generate_content(
+            [COMBINED_ANALYSIS_PROMPT, image_part],
+            generation_config=genai.GenerationConfig(
+                response_mime_type="application/json",
+                response_schema=CombinedAdAnalysis,
+            ),
+        )
+        text = (response.text or "").strip()
+        if not text:
+            raise ValueError("Empty response from Gemini")
+
+        data = json.loads(text)
+        analysis_text = str(data.get("analysis_text") or "").strip()
+        if not analysis_text:
+            raise ValueError("Gemini response is missing analysis_text")
+        return {
+            'analysis_text': analysis_text,
+            'extracted_text': str(data.get("extracted_text") or "").strip(),
+            'generated_comments': [str(c).strip() for c in data.get("generated_comments") or [] if str(c).strip()],
+        }
+
+    except Exception as e:
+        print(f"Error analyzing image with Gemini (combined): {str(e)}")
+        return {
+            'analysis_text': f"[AI_ERROR] {str(e)}",
+            'extracted_text': "",
+            'generated_comments': [],
+        }
+
+
 def parse_structured_response(response: str) -> Dict[str, str]:
     """
     Parse the structured response from LangChain into a dictionary.
@@ -0,0 +1,175 @@
+"""
+Image derivatives for uploaded creatives.
+After an upload is stored, a background worker decodes the original once, writes resized
+thumbnail and preview copies (WebP by default, or JPEG) next to it in S3, and records their
+keys on the Image row so listings can serve small images instead of the full-size file.
+prepare_for_vision() similarly shrinks large uploads before they are sent to Gemini.
+"""
+import os
+import asyncio
+from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Tuple
+
+from PIL import Image as PILImage, ImageOps
+
+from database import AsyncSessionLocal
+from models import Image
+from util import upload_image_async
+
+DERIVATIVES_ENABLED = os.getenv("DERIVATIVES_ENABLED", "true").lower() in ("1", "true", "yes")
+DERIVATIVE_FORMAT = os.getenv("DERIVATIVE_FORMAT", "webp").lower()  # "webp" or "jpeg"
+DERIVATIVE_QUALITY = int(os.getenv("DERIVATIVE_QUALITY", "80"))
+THUMBNAIL_MAX_EDGE = int(os.getenv("THUMBNAIL_MAX_EDGE", "320"))
+PREVIEW_MAX_EDGE = int(os.getenv("PREVIEW_MAX_EDGE", "1280"))
+DERIVATIVE_WORKERS = int(os.getenv("DERIVATIVE_WORKERS", "2"))
+
+# What Gemini receives: uploads larger than VISION_MAX_EDGE are downscaled and re-encoded (0 disables)
+VISION_MAX_EDGE = int(os.getenv("VISION_MAX_EDGE", "1536"))
+VISION_FORMAT = os.getenv("VISION_FORMAT", "jpeg").lower()  # "jpeg" or "webp"
+VISION_QUALITY = int(os.getenv("VISION_QUALITY", "85"))
+# Part of the analysis cache key; bump when prepare_for_vision changes what Gemini is sent
+VISION_PIPELINE_VERSION = "3"
+
+# Transparent areas are composited onto this colour when encoding JPEG
+JPEG_BACKGROUND = (255, 255, 255)
+
+# Formats the Gemini vision API accepts as-is
+_VISION_PASSTHROUGH_TYPES = ("image/jpeg", "image/png", "image/webp")
+
+# Derivative name -> (max edge in px, Image column holding its S3 key)
+DERIVATIVES = {
+    "thumb": (THUMBNAIL_MAX_EDGE, "thumbnail_key"),
+    "preview": (PREVIEW_MAX_EDGE, "preview_key"),
+}
+
+_FORMATS = {
+    "webp": ("WEBP", "image/webp", ".webp"),
+    "jpeg": ("JPEG", "image/jpeg", ".jpg"),
+    "png": ("PNG", "image/png", ".png"),
+}
+
+# Pillow releases the GIL while resizing/encoding, so a couple of threads keep up with uploads
+_imaging_executor = ThreadPoolExecutor(max_workers=DERIVATIVE_WORKERS, thread_name_prefix="imaging")
+
+# Strong references to in-flight derivative tasks so they are not garbage collected
+_pending_tasks = set()
+
+
+def decode_image(image_bytes: bytes) -> PILImage.Image:
+    """
+    Decode image bytes and apply the EXIF orientation, so derivatives match what browsers show.
+    """
+    image = PILImage.open(BytesIO(image_bytes))
+    return ImageOps.exif_transpose(image)
+
+
+def encode_resized(image: PILImage.Image, max_edge: int, fmt: str = DERIVATIVE_FORMAT, quality: int = DERIVATIVE_QUALITY) -> Tuple[bytes, str]:
+    """
+    Downscale an image so its longest edge is at most max_edge (never upscales) and encode it.
+    Args:
+        image: Decoded Pillow image.
+        max_edge: Maximum width/height in pixels.
+        fmt: "webp", "jpeg" or "png" (lossless; quality is ignored).
+        quality: Encoder quality (1-100).
+    Returns:
+        (encoded bytes, MIME type)
+    """
+    pil_format, mime_type, _ = _FORMATS[fmt]
+    # Palette images are expanded first: resizing them directly falls back to nearest-neighbour
+    has_alpha = "A" in image.getbands() or "transparency" in image.info
+    mode = "RGBA" if has_alpha else (image.mode if image.mode in ("RGB", "L") else "RGB")
+    resized = image.convert(mode) if image.mode != mode else image.copy()
+    resized.thumbnail((max_edge, max_edge), PILImage.LANCZOS)
+
+    if pil_format == "JPEG" and resized.mode == "RGBA":
+        # JPEG has no alpha: flatten onto white, as a browser shows it, so dark text and
+        # logos on a transparent background stay visible instead of turning black
+        background = PILImage.new("RGB", resized.size, JPEG_BACKGROUND)
+        background.paste(resized, mask=resized.getchannel("A"))
+        resized = background
+
+    buffer = BytesIO()
+    resized.save(buffer, format=pil_format, quality=quality, optimize=True)
+    return buffer.getvalue(), mime_type
+
+
+def generate_derivatives(image_bytes: bytes) -> Dict[str, Tuple[bytes, str]]:
+    """
+    Decode the original once and produce every configured derivative.
+    Returns:
+        Dictionary mapping derivative name ("thumb", "preview") to (bytes, MIME type).
+    """
+    image = decode_image(image_bytes)
+    image.load()
+    return {name: encode_resized(image, max_edge) for name, (max_edge, _) in DERIVATIVES.items()}
+
+
+def prepare_for_vision(image_bytes: bytes, mime_type: str) -> Tuple[bytes, str]:
+    """
+    Shrink an upload for the vision model: decode once, downscale so the longest edge is at
+    most VISION_MAX_EDGE and re-encode at VISION_QUALITY. Small images in a supported format
+    are passed through untouched, and anything Pillow cannot decode is sent as-is.
+    Args:
+        image_bytes: Original upload bytes.
+        mime_type: MIME type of the upload.
+    Returns:
+        (bytes, MIME type) to send to Gemini.
+    """
+    if VISION_MAX_EDGE <= 0:
+        return image_bytes, mime_type
+    try:
+        image = decode_image(image_bytes)
+        oversized = max(image.size) > VISION_MAX_EDGE
+        if not oversized and mime_type in _VISION_PASSTHROUGH_TYPES:
+            return image_bytes, mime_type
+        image.load()
+        data, new_mime_type = encode_resized(image, VISION_MAX_EDGE, VISION_FORMAT, VISION_QUALITY)
+        if oversized and len(data) >= len(image_bytes):
+            # Flat graphics can come out larger as JPEG/WebP than the original PNG; the
+            # original is still too big to send, so keep the downscaled image, losslessly
+            data, new_mime_type = encode_resized(image, VISION_MAX_EDGE, "png")
+    except Exception as e:
+        print(f"Vision preprocessing skipped: {e}")
+        return image_bytes, mime_type
+    return data, new_mime_type
+
+
+def derivative_key(original_key: str, name: str) -> str:
+    """S3 key of a derivative stored beside the original, e.g. uploads/abc.thumb.webp"""
+    return f"{os.path.splitext(original_key)[0]}.{name}{_FORMATS[DERIVATIVE_FORMAT][2]}"
+
+
+async def create_derivatives(image_id: int, image_bytes: bytes, bucket: str, original_key: str) -> None:
+    """
+    Generate, upload and record the derivatives for one stored image.
+    Failures are logged; the image keeps serving its original URL.
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        derivatives = await loop.run_in_executor(_imaging_executor, generate_derivatives, image_bytes)
+        keys = {}
+        for name, (data, mime_type) in derivatives.items():
+            key = derivative_key(original_key, name)
+            await upload_image_async(BytesIO(data), bucket, key, key=key, content_type=mime_type)
+            keys[DERIVATIVES[name][1]] = key
+
+        async with AsyncSessionLocal() as db:
+            image = await db.get(Image, image_id)
+            if image is None:
+                # Deleted while we were working; the S3 objects are left like the original
+                return
+            for column, key in keys.items():
+                setattr(image, column, key)
+            await db.commit()
+    except Exception as e:
+        print(f"Derivative generation failed for image {image_id}: {e}")
+
+
+def schedule_derivatives(image_id: int, image_bytes: bytes, bucket: str, original_key: str) -> None:
+    """Start derivative generation in the background without delaying the response"""
+    if not DERIVATIVES_ENABLED:
+        return
+    task = asyncio.create_task(create_derivatives(image_id, image_bytes, bucket, original_key))
+    _pending_tasks.add(task)
+    task.add_done_callback(_pending_tasks.discard)
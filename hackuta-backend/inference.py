@@ -0,0 +1,195 @@
+"""
+Local inference backends for the analysis pipeline.
+
+LocalInference runs MiniLM, toxic-bert and the sklearn models in this process via the
+lazy model registry, on PyTorch or ONNX Runtime depending on INFERENCE_BACKEND.
+RemoteInference forwards the same operations to a shared inference_server.py process
+over a local socket, so N uvicorn workers share one copy of the models and their
+requests are batched together. Set INFERENCE_SERVER_ADDRESS
+to switch every worker to the remote backend.
+"""
+import os
+import sys
+import queue
+import threading
+from multiprocessing.connection import Client
+from typing import Any, Dict, List, Optional
+
+import joblib
+import numpy as np
+
+from model_registry import registry as model_registry
+
+# Shared embedding service and trained models live with the training code in ../ml
+ML_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ml")
+sys.path.append(ML_DIR)
+from embedding_service import get_embedding_service
+
+# "torch" (HuggingFace eager fp32) or "onnx" (ONNX Runtime, see onnx_backend.py)
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "torch").lower()
+INFERENCE_SERVER_ADDRESS = os.getenv("INFERENCE_SERVER_ADDRESS")  # "host:port" or a unix socket path
+# Shared secret for the inference socket. The server unpickles requests, so there is no default.
+INFERENCE_SERVER_AUTHKEY = os.getenv("INFERENCE_SERVER_AUTHKEY", "").encode()
+INFERENCE_AUTHKEY_MIN_LENGTH = 16
+# Placeholder keys from earlier versions and the setup guide, refused like an empty key
+PLACEHOLDER_AUTHKEYS = (b"change-this-inference-key", b"change-me")
+INFERENCE_CLIENT_POOL_SIZE = int(os.getenv("INFERENCE_CLIENT_POOL_SIZE", "8"))
+
+# Micro-batching limits, used both in-process (batching.py) and by inference_server.py
+INFERENCE_MAX_BATCH = int(os.getenv("INFERENCE_MAX_BATCH", "64"))
+INFERENCE_MAX_WAIT_MS = float(os.getenv("INFERENCE_MAX_WAIT_MS", "5"))
+
+
+class TorchToxicityScorer:
+    """Top-label unitary/toxic-bert score per text via the transformers pipeline (eager fp32)"""
+
+    def __init__(self, model_name: str = "unitary/toxic-bert"):
+        from transformers import pipeline
+        self._pipeline = pipeline("text-classification", model=model_name)
+
+    def __call__(self, texts: List[str]) -> np.ndarray:
+        texts = list(texts)
+        if not texts:
+            return np.zeros(0)
+        outputs = self._pipeline(texts, batch_size=len(texts), truncation=True)
+        return np.array([out["score"] for out in outputs])
+
+
+def _load_embedding_service():
+    encoder_factory = None
+    if INFERENCE_BACKEND == "onnx":
+        from onnx_backend import OnnxEncoder
+        encoder_factory = OnnxEncoder
+    service = get_embedding_service(encoder_factory)
+    service.load()
+    return service
+
+
+def _load_toxicity_model():
+    if INFERENCE_BACKEND == "onnx":
+        from onnx_backend import OnnxToxicityScorer
+        return OnnxToxicityScorer()
+    return TorchToxicityScorer()
+
+
+# Models load lazily on first use (or during the startup warm-up in app.py)
+model_registry.register("embeddings", _load_embedding_service)
+model_registry.register("toxicity", _load_toxicity_model)
+model_registry.register("comment_sentiment", lambda: joblib.load(os.path.join(ML_DIR, "saved_models", "comment_sentiment_model.pkl")))
+model_registry.register("ad_receptiveness", lambda: joblib.load(os.path.join(ML_DIR, "saved_models", "ad_receptiveness_model.pkl")))
+
+
+def parse_address(address: str):
+    """'host:port' -> (host, port) for TCP, anything else is treated as a unix socket path"""
+    host, sep, port = address.rpartition(":")
+    if sep and port.isdigit():
+        return (host or "127.0.0.1", int(port))
+    return address
+
+
+def authkey_problem(authkey: bytes) -> Optional[str]:
+    """Why authkey is unsafe to use for the inference socket, or None if it is fine"""
+    if not authkey:
+        return "INFERENCE_SERVER_AUTHKEY is not set"
+    if authkey in PLACEHOLDER_AUTHKEYS:
+        return "INFERENCE_SERVER_AUTHKEY is still a placeholder value"
+    if len(authkey) < INFERENCE_AUTHKEY_MIN_LENGTH:
+        return f"INFERENCE_SERVER_AUTHKEY must be at least {INFERENCE_AUTHKEY_MIN_LENGTH} characters"
+    return None
+
+
+class LocalInference:
+    """Runs every operation in-process using the lazily loaded models"""
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Mean-pooled MiniLM embeddings, shape (len(texts), 384)"""
+        return model_registry.get("embeddings").embed_batch(texts)
+
+    def toxicity(self, texts: List[str]) -> np.ndarray:
+        """Top-label toxic-bert score for each text, run as a single batch"""
+        return model_registry.get("toxicity")(texts)
+
+    def comment_proba(self, X: np.ndarray) -> np.ndarray:
+        """Comment sentiment class probabilities, rows of [p_neg, p_neu, p_pos]"""
+        return model_registry.get("comment_sentiment").predict_proba(X)
+
+    def ad_receptiveness(self, X: np.ndarray) -> np.ndarray:
+        """Ad-level receptiveness regression output for rows of [ad embedding, mean sentiment]"""
+        return model_registry.get("ad_receptiveness").predict(X)
+
+    def status(self) -> Dict[str, Any]:
+        return model_registry.status()
+
+    async def warm_up(self) -> None:
+        await model_registry.warm_up()
+
+
+class RemoteInference:
+    """
+    Client for inference_server.py. Keeps a small pool of connections so concurrent
+    threads can each have a request in flight.
+    """
+
+    def __init__(self, address: str, authkey: bytes, pool_size: int = INFERENCE_CLIENT_POOL_SIZE):
+        self.address = parse_address(address)
+        self.authkey = authkey
+        self._pool: "queue.LifoQueue" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(pool_size)
+
+    def _call(self, op: str, payload: Any = None) -> Any:
+        with self._slots:
+            try:
+                conn = self._pool.get_nowait()
+            except queue.Empty:
+                conn = Client(self.address, authkey=self.authkey)
+            try:
+                conn.send((op, payload))
+                ok, result = conn.recv()
+            except BaseException:
+                # Server restarted, connection dropped or the exchange was cut short;
+                # the connection may be mid-message, so don't return it to the pool
+                conn.close()
+                raise
+            self._pool.put(conn)
+        if not ok:
+            raise RuntimeError(f"Inference server error in '{op}': {result}")
+        return result
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        return self._call("embed", list(texts))
+
+    def toxicity(self, texts: List[str]) -> np.ndarray:
+        return self._call("toxicity", list(texts))
+
+    def comment_proba(self, X: np.ndarray) -> np.ndarray:
+        return self._call("comment_proba", np.asarray(X))
+
+    def ad_receptiveness(self, X: np.ndarray) -> np.ndarray:
+        return self._call("ad_receptiveness", np.asarray(X))
+
+    def status(self) -> Dict[str, Any]:
+        try:
+            return self._call("status")
+        except Exception as e:
+            return {"inference_server": {"state": "unreachable", "error": str(e)}}
+
+    async def warm_up(self) -> None:
+        # The inference server warms its own models on start
+        return None
+
+
+_inference: Optional[Any] = None
+
+
+def get_inference():
+    """Process-wide inference backend selected by INFERENCE_SERVER_ADDRESS"""
+    global _inference
+    if _inference is None:
+        if INFERENCE_SERVER_ADDRESS:
+            problem = authkey_problem(INFERENCE_SERVER_AUTHKEY)
+            if problem:
+                raise RuntimeError(f"{problem}; it is required with INFERENCE_SERVER_ADDRESS")
+            _inference = RemoteInference(INFERENCE_SERVER_ADDRESS, INFERENCE_SERVER_AUTHKEY)
+        else:
+            _inference = LocalInference()
+    return _inference
@@ -0,0 +1,187 @@
+"""
+Standalone inference process shared by all uvicorn workers on a node.
+
+Hosts one copy of MiniLM, toxic-bert and the sklearn models and serves them over a
+multiprocessing Listener (TCP or unix socket). Requests for the same operation that
+arrive from different workers within INFERENCE_MAX_WAIT_MS are merged into a single
+model call of up to INFERENCE_MAX_BATCH items.
+
+The Listener unpickles every request, so anyone who can connect with the authkey can run
+code here. The server refuses to start without a real INFERENCE_SERVER_AUTHKEY and only
+binds a unix socket (mode 0600) or a loopback address unless INFERENCE_SERVER_ALLOW_REMOTE
+is set.
+
+Usage:
+    export INFERENCE_SERVER_AUTHKEY=$(python -c "import secrets; print(secrets.token_hex(32))")
+    INFERENCE_SERVER_ADDRESS=/tmp/hackuta-inference.sock python inference_server.py
+    INFERENCE_SERVER_ADDRESS=/tmp/hackuta-inference.sock uvicorn app:app --workers 4
+"""
+import os
+import sys
+import ipaddress
+import time
+import queue
+import threading
+import asyncio
+from multiprocessing.connection import Listener
+from typing import Any, Callable, List
+
+import numpy as np
+
+from inference import (
+    LocalInference,
+    parse_address,
+    authkey_problem,
+    INFERENCE_SERVER_ADDRESS,
+    INFERENCE_SERVER_AUTHKEY,
+    INFERENCE_MAX_BATCH,
+    INFERENCE_MAX_WAIT_MS,
+)
+
+BATCHED_OPS = ("embed", "toxicity", "comment_proba", "ad_receptiveness")
+
+# Allow binding a non-loopback TCP address (only on a private network you trust)
+INFERENCE_SERVER_ALLOW_REMOTE = os.getenv("INFERENCE_SERVER_ALLOW_REMOTE", "false").lower() in ("1", "true", "yes")
+
+
+def _is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def check_server_config(address, authkey: bytes) -> None:
+    """Raise RuntimeError if the server would accept pickled requests from untrusted peers"""
+    problem = authkey_problem(authkey)
+    if problem:
+        raise RuntimeError(f"Refusing to start the inference server: {problem}")
+    if isinstance(address, tuple) and not _is_loopback(address[0]) and not INFERENCE_SERVER_ALLOW_REMOTE:
+        raise RuntimeError(
+            f"Refusing to bind the inference server to {address[0]}: use a unix socket path or a "
+            "loopback address, or set INFERENCE_SERVER_ALLOW_REMOTE=true"
+        )
+
+
+class _Request:
+    __slots__ = ("payload", "done", "result", "error")
+
+    def __init__(self, payload):
+        self.payload = payload
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class OpBatcher:
+    """
+    Collects requests for one operation and runs them as a single batch on a dedicated thread.
+    Payloads are lists of texts or 2-D arrays; results are split back by row counts.
+    """
+
+    def __init__(self, fn: Callable[[Any], Any], max_batch: int, max_wait_ms: float):
+        self.fn = fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue: "queue.Queue[_Request]" = queue.Queue()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def submit(self, payload) -> Any:
+        request = _Request(payload)
+        self._queue.put(request)
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def _collect(self) -> List[_Request]:
+        batch = [self._queue.get()]
+        size = len(batch[0].payload)
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            batch.append(request)
+            size += len(request.payload)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            counts = [len(r.payload) for r in batch]
+            try:
+                if isinstance(batch[0].payload, np.ndarray):
+                    merged = np.vstack([r.payload for r in batch])
+                else:
+                    merged = [item for r in batch for item in r.payload]
+                results = np.asarray(self.fn(merged))
+                offset = 0
+                for request, count in zip(batch, counts):
+                    request.result = results[offset:offset + count]
+                    offset += count
+            except Exception as e:
+                for request in batch:
+                    request.error = e
+            for request in batch:
+                request.done.set()
+
+
+def _handle_connection(conn, batchers, inference):
+    with conn:
+        while True:
+            try:
+                op, payload = conn.recv()
+            except (EOFError, OSError):
+                return
+            try:
+                if op == "status":
+                    result = inference.status()
+                elif op in batchers:
+                    result = batchers[op].submit(payload)
+                else:
+                    raise ValueError(f"Unknown operation: {op}")
+                conn.send((True, result))
+            except Exception as e:
+                conn.send((False, str(e)))
+
+
+def serve(address, authkey: bytes):
+    check_server_config(address, authkey)
+    inference = LocalInference()
+    batchers = {
+        op: OpBatcher(getattr(inference, op), INFERENCE_MAX_BATCH, INFERENCE_MAX_WAIT_MS)
+        for op in BATCHED_OPS
+    }
+    threading.Thread(target=lambda: asyncio.run(inference.warm_up()), daemon=True).start()
+
+    with Listener(address, backlog=128, authkey=authkey) as listener:
+        if isinstance(address, str):
+            # Only this user may connect to the unix socket
+            os.chmod(address, 0o600)
+        print(f"Inference server listening on {address}")
+        while True:
+            try:
+                conn = listener.accept()
+            except Exception as e:
+                # Failed handshake (wrong authkey) or aborted connect; keep serving
+                print(f"Inference server rejected connection: {e}")
+                continue
+            threading.Thread(target=_handle_connection, args=(conn, batchers, inference), daemon=True).start()
+
+
+if __name__ == "__main__":
+    if not INFERENCE_SERVER_ADDRESS:
+        print("Set INFERENCE_SERVER_ADDRESS (host:port or unix socket path)")
+        sys.exit(2)
+    try:
+        serve(parse_address(INFERENCE_SERVER_ADDRESS), INFERENCE_SERVER_AUTHKEY)
+    except RuntimeError as e:
+        print(e)
+        sys.exit(2)
@@ -0,0 +1,374 @@
+"""
+Background analysis jobs for POST /analyze/jobs.
+The endpoint stores the upload and an Image row, enqueues a job and returns its id right away.
+A pool of worker coroutines runs the analysis pipeline, writes the result into the Image row and
+records the job status for GET /analyze/jobs/{id}.
+
+The queue is in-process by default. Set JOB_QUEUE_URL to a Redis-compatible server
+(redis://host:6379/0 - Redis, Valkey, or a local instance for development) to share one
+queue and job table between several API nodes.
+
+Jobs survive restarts: in-process mode records the owning process and a heartbeat on each pending
+Image row, and re-queues rows whose owner stopped heartbeating. The Redis backend moves each job
+into a per-process processing list until it finishes, so jobs held by a process that died are
+put back on the queue.
+"""
+import os
+import json
+import time
+import uuid
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import select, update, or_, and_
+
+from analyze import analyze_image_bytes
+from database import AsyncSessionLocal
+from models import Image
+from util import download_image_async
+
+JOB_QUEUE_URL = os.getenv("JOB_QUEUE_URL")  # unset = in-process queue
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_RESULT_TTL = int(os.getenv("JOB_RESULT_TTL", "86400"))  # seconds a finished job stays queryable
+JOB_REDIS_PREFIX = os.getenv("JOB_REDIS_PREFIX", "hackuta:jobs")
+# Jobs waiting per queue; in-process jobs hold the upload bytes, so this bounds memory too
+JOB_QUEUE_MAX_SIZE = int(os.getenv("JOB_QUEUE_MAX_SIZE", "100"))
+# A worker process that has not checked in for this long is presumed dead and its jobs re-queued
+JOB_CONSUMER_TTL = int(os.getenv("JOB_CONSUMER_TTL", "60"))
+
+# Image rows in these states have a job that has not finished
+PENDING_STATUSES = ("queued", "running")
+
+# Identifies this process as the owner of the pending Image rows it queued (in-process queue)
+WORKER_ID = uuid.uuid4().hex
+
+
+class JobQueueFull(Exception):
+    """The job queue is at JOB_QUEUE_MAX_SIZE"""
+
+
+class InMemoryJobBackend:
+    """
+    Single-process queue and job table. Payloads are passed by reference, so the upload bytes
+    go straight to the worker without a round trip through S3.
+    """
+    local = True
+
+    def __init__(self, max_size: int = JOB_QUEUE_MAX_SIZE):
+        self._queue: "asyncio.Queue[Tuple[str, Dict[str, Any]]]" = asyncio.Queue(maxsize=max(max_size, 0))
+        self._jobs: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+
+    async def is_full(self) -> bool:
+        return self._queue.full()
+
+    async def enqueue(self, job_id: str, payload: Dict[str, Any]) -> None:
+        try:
+            self._queue.put_nowait((job_id, payload))
+        except asyncio.QueueFull:
+            raise JobQueueFull() from None
+
+    async def dequeue(self, timeout: float) -> Optional[Tuple[str, Dict[str, Any], Any]]:
+        try:
+            job_id, payload = await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        return job_id, payload, None
+
+    async def ack(self, receipt: Any) -> None:
+        return None
+
+    async def heartbeat(self) -> None:
+        """Mark this process's pending Image rows as still owned"""
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(Image)
+                .where(Image.job_owner == WORKER_ID, Image.analysis_status.in_(PENDING_STATUSES))
+                .values(job_heartbeat_at=datetime.utcnow())
+            )
+            await db.commit()
+
+    async def requeue_orphaned(self, bucket: str) -> int:
+        return await recover_interrupted_jobs(bucket)
+
+    async def set_status(self, job_id: str, status: Dict[str, Any]) -> None:
+        now = time.monotonic()
+        self._jobs[job_id] = (now + JOB_RESULT_TTL, status)
+        # Drop expired entries so the table doesn't grow without bound
+        expired = [key for key, (expires, _) in self._jobs.items() if expires <= now]
+        for key in expired:
+            del self._jobs[key]
+
+    async def get_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        entry = self._jobs.get(job_id)
+        if entry is None or entry[0] <= time.monotonic():
+            return None
+        return entry[1]
+
+    async def close(self) -> None:
+        return None
+
+
+class RedisJobBackend:
+    """
+    Queue in a Redis list and job statuses in expiring string keys, so any node can enqueue,
+    work on or report any job. Payloads must be JSON; workers fetch the image from S3.
+    Dequeued jobs move atomically into this process's processing list and are removed when
+    acknowledged. Each process refreshes a heartbeat key; processing lists whose owner's
+    heartbeat expired are pushed back onto the queue by requeue_orphaned().
+    Requires the optional redis package (redis.asyncio) and Redis 6.2+ for BLMOVE/LMOVE.
+    """
+    local = False
+
+    def __init__(self, url: str, prefix: str = JOB_REDIS_PREFIX, max_size: int = JOB_QUEUE_MAX_SIZE):
+        import redis.asyncio as redis
+        self._redis = redis.from_url(url)
+        self.max_size = max_size
+        self.consumer_id = uuid.uuid4().hex
+        self._queue_key = f"{prefix}:queue"
+        self._status_prefix = f"{prefix}:status:"
+        self._processing_prefix = f"{prefix}:processing:"
+        self._consumer_prefix = f"{prefix}:consumer:"
+        self._processing_key = self._processing_prefix + self.consumer_id
+
+    async def is_full(self) -> bool:
+        return self.max_size > 0 and await self._redis.llen(self._queue_key) >= self.max_size
+
+    async def enqueue(self, job_id: str, payload: Dict[str, Any]) -> None:
+        if await self.is_full():
+            raise JobQueueFull()
+        await self._redis.lpush(self._queue_key, json.dumps({"job_id": job_id, "payload": payload}))
+
+    async def dequeue(self, timeout: float) -> Optional[Tuple[str, Dict[str, Any], Any]]:
+        raw = await self._redis.blmove(self._queue_key, self._processing_key, max(1, int(timeout)), "RIGHT", "LEFT")
+        if raw is None:
+            return None
+        message = json.loads(raw)
+        return message["job_id"], message["payload"], raw
+
+    async def ack(self, receipt: Any) -> None:
+        await self._redis.lrem(self._processing_key, 1, receipt)
+
+    async def heartbeat(self) -> None:
+        await self._redis.set(self._consumer_prefix + self.consumer_id, "1", ex=JOB_CONSUMER_TTL)
+
+    async def requeue_orphaned(self, bucket: str) -> int:
+        """Move jobs held by consumers without a live heartbeat back onto the queue (oldest first)"""
+        moved = 0
+        async for key in self._redis.scan_iter(match=self._processing_prefix + "*"):
+            key = key.decode() if isinstance(key, bytes) else key
+            consumer_id = key[len(self._processing_prefix):]
+            if consumer_id == self.consumer_id or await self._redis.exists(self._consumer_prefix + consumer_id):
+                continue
+            while await self._redis.lmove(key, self._queue_key, "RIGHT", "RIGHT") is not None:
+                moved += 1
+        if moved:
+            print(f"Re-queued {moved} analysis jobs from stopped workers")
+        return moved
+
+    async def set_status(self, job_id: str, status: Dict[str, Any]) -> None:
+        await self._redis.set(self._status_prefix + job_id, json.dumps(status), ex=JOB_RESULT_TTL)
+
+    async def get_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        raw = await self._redis.get(self._status_prefix + job_id)
+        return json.loads(raw) if raw is not None else None
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+
+_backend = None
+_workers = []
+
+
+def job_owner_columns() -> Dict[str, Any]:
+    """Image column values that mark a new pending row as owned by this process"""
+    return {"job_owner": WORKER_ID, "job_heartbeat_at": datetime.utcnow()}
+
+
+def get_job_backend():
+    """Process-wide job backend selected by JOB_QUEUE_URL"""
+    global _backend
+    if _backend is None:
+        _backend = RedisJobBackend(JOB_QUEUE_URL) if JOB_QUEUE_URL else InMemoryJobBackend()
+    return _backend
+
+
+async def submit_analysis_job(image_id: int, user_id: int, bucket: str, s3_key: str, mime_type: str, image_bytes: bytes) -> str:
+    """
+    Queue analysis for an already stored Image row and return the job id.
+    The bytes are only carried in-process; remote workers download the object from S3.
+    """
+    backend = get_job_backend()
+    job_id = uuid.uuid4().hex
+    payload = {"image_id": image_id, "bucket": bucket, "s3_key": s3_key, "mime_type": mime_type}
+    if backend.local:
+        payload["image_bytes"] = image_bytes
+    await backend.set_status(job_id, {"status": "queued", "image_id": image_id, "user_id": user_id})
+    await backend.enqueue(job_id, payload)
+    return job_id
+
+
+async def job_queue_full() -> bool:
+    """Whether new jobs would be rejected right now (checked before storing an upload)"""
+    return await get_job_backend().is_full()
+
+
+async def get_job_status(job_id: str) -> Optional[Dict[str, Any]]:
+    return await get_job_backend().get_status(job_id)
+
+
+async def _set_image_status(image_id: int, status: str, analysis_text: Optional[str] = None) -> None:
+    async with AsyncSessionLocal() as db:
+        image = await db.get(Image, image_id)
+        if image is None:
+            return
+        image.analysis_status = status
+        if analysis_text is not None:
+            image.analysis_text = analysis_text
+        await db.commit()
+
+
+def _orphaned(cutoff: datetime):
+    """Pending rows whose owner has not heartbeated since cutoff (rows from before owners were recorded go by updated_at)"""
+    return and_(
+        Image.analysis_status.in_(PENDING_STATUSES),
+        or_(Image.job_owner.is_(None), Image.job_owner != WORKER_ID),
+        or_(
+            Image.job_heartbeat_at < cutoff,
+            and_(Image.job_heartbeat_at.is_(None), Image.updated_at < cutoff),
+        ),
+    )
+
+
+async def recover_interrupted_jobs(bucket: str) -> int:
+    """
+    Re-queue analysis for Image rows whose owning process stopped heartbeating for
+    JOB_CONSUMER_TTL seconds (in-process queue only; the Redis backend re-queues through its
+    processing lists). Live sibling processes keep their rows fresh, so only a dead process's
+    jobs are taken. Rows are claimed with a conditional update, so several processes
+    recovering at once don't both take one.
+    Rows that cannot be re-queued (no stored object, or the queue is full) are marked failed.
+    """
+    backend = get_job_backend()
+    if not backend.local:
+        return 0
+    cutoff = datetime.utcnow() - timedelta(seconds=JOB_CONSUMER_TTL)
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(Image.id, Image.user_id, Image.s3_key, Image.content_type).where(_orphaned(cutoff))
+        )
+        rows = result.all()
+        requeued = 0
+        for image_id, user_id, s3_key, content_type in rows:
+            claimed = await db.execute(
+                update(Image)
+                .where(Image.id == image_id, _orphaned(cutoff))
+                .values(analysis_status="queued", **job_owner_columns())
+            )
+            await db.commit()
+            if claimed.rowcount != 1:
+                continue
+            if not s3_key:
+                await _set_image_status(image_id, "failed", "[AI_ERROR] Analysis was interrupted; please retry")
+                continue
+            try:
+                await submit_analysis_job(image_id, user_id, bucket, s3_key, content_type or "image/png", None)
+                requeued += 1
+            except JobQueueFull:
+                await _set_image_status(image_id, "failed", "[AI_ERROR] Analysis was interrupted; please retry")
+    if rows:
+        print(f"Recovered {requeued} of {len(rows)} interrupted analysis jobs")
+    return requeued
+
+
+async def _process(job_id: str, payload: Dict[str, Any]) -> None:
+    backend = get_job_backend()
+    status = await backend.get_status(job_id) or {}
+    image_id = payload["image_id"]
+    status.update({"status": "running", "image_id": image_id})
+    await backend.set_status(job_id, status)
+    await _set_image_status(image_id, "running")
+
+    try:
+        image_bytes = payload.get("image_bytes")
+        if image_bytes is None:
+            image_bytes = (await download_image_async(payload["bucket"], payload["s3_key"])).getvalue()
+
+        async with AsyncSessionLocal() as db:
+            result = await analyze_image_bytes(image_bytes, payload["mime_type"], db)
+
+        analysis_text = result.get("analysis_text", "")
+        if analysis_text.startswith("[AI_ERROR]"):
+            await _set_image_status(image_id, "failed", "[AI_ERROR] Analysis failed")
+            status.update({"status": "failed", "error": "Analysis failed"})
+        else:
+            await _set_image_status(image_id, "done", analysis_text)
+            status.update({
+                "status": "done",
+                "analytics": result.get("analytics", {}),
+                "comments": result.get("comments", []),
+            })
+    except Exception as e:
+        print(f"Analysis job {job_id} failed: {e}")
+        try:
+            await _set_image_status(image_id, "failed")
+        except Exception:
+            pass
+        status.update({"status": "failed", "error": str(e)})
+    await backend.set_status(job_id, status)
+
+
+async def _worker() -> None:
+    backend = get_job_backend()
+    while True:
+        try:
+            item = await backend.dequeue(timeout=5)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Queue server unavailable; back off instead of spinning
+            print(f"Job queue error: {e}")
+            await asyncio.sleep(1)
+            continue
+        if item is None:
+            continue
+        job_id, payload, receipt = item
+        await _process(job_id, payload)
+        try:
+            await backend.ack(receipt)
+        except Exception as e:
+            print(f"Failed to acknowledge job {job_id}: {e}")
+
+
+async def _heartbeat(bucket: str) -> None:
+    """Keep this process's jobs marked as alive and re-queue jobs from dead processes"""
+    backend = get_job_backend()
+    while True:
+        try:
+            await backend.heartbeat()
+            await backend.requeue_orphaned(bucket)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Job heartbeat error: {e}")
+        await asyncio.sleep(max(JOB_CONSUMER_TTL / 3, 1))
+
+
+def start_job_workers(bucket: str) -> None:
+    """
+    Start JOB_WORKERS worker coroutines on the running event loop, plus the heartbeat that
+    re-queues jobs from stopped processes (objects are downloaded from bucket)
+    """
+    _workers.append(asyncio.create_task(_heartbeat(bucket)))
+    for _ in range(JOB_WORKERS):
+        _workers.append(asyncio.create_task(_worker()))
+
+
+async def stop_job_workers() -> None:
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+    if _backend is not None:
+        await _backend.close()
@@ -0,0 +1,43 @@
+"""analysis cache table and images.content_hash
+
+The analysis cache table was created by create_all before migrations existed, so it is
+only created here if missing; the same goes for the column on databases that already have it.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2025-10-05
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+
+    if not inspector.has_table("analysis_cache"):
+        op.create_table(
+            "analysis_cache",
+            sa.Column("cache_key", sa.String(64), primary_key=True),
+            sa.Column("payload", sa.Text(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+        )
+
+    if "content_hash" not in {column["name"] for column in inspector.get_columns("images")}:
+        with op.batch_alter_table("images") as batch:
+            batch.add_column(sa.Column("content_hash", sa.String(64), nullable=True))
+
+    if "ix_images_content_hash" not in {index["name"] for index in inspector.get_indexes("images")}:
+        op.create_index("ix_images_content_hash", "images", ["content_hash"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_images_content_hash", table_name="images")
+    with op.batch_alter_table("images") as batch:
+        batch.drop_column("content_hash")
+    op.drop_table("analysis_cache")
@@ -0,0 +1,34 @@
+"""images.s3_key for re-signing URLs on read
+
+Columns that already exist (e.g. from create_all on newer models) are skipped.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2025-10-05
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+IMAGE_COLUMNS = [
+    sa.Column("s3_key", sa.String(1024), nullable=True),
+]
+
+
+def upgrade() -> None:
+    existing = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("images")}
+    with op.batch_alter_table("images") as batch:
+        for column in IMAGE_COLUMNS:
+            if column.name not in existing:
+                batch.add_column(column)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("images") as batch:
+        for column in reversed(IMAGE_COLUMNS):
+            batch.drop_column(column.name)
@@ -0,0 +1,34 @@
+"""images.analysis_status for background analysis jobs
+
+Columns that already exist (e.g. from create_all on newer models) are skipped.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2025-10-05
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+IMAGE_COLUMNS = [
+    sa.Column("analysis_status", sa.String(20), nullable=True),
+]
+
+
+def upgrade() -> None:
+    existing = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("images")}
+    with op.batch_alter_table("images") as batch:
+        for column in IMAGE_COLUMNS:
+            if column.name not in existing:
+                batch.add_column(column)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("images") as batch:
+        for column in reversed(IMAGE_COLUMNS):
+            batch.drop_column(column.name)
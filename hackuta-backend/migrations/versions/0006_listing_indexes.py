@@ -0,0 +1,35 @@
+"""composite indexes for the image and campaign listings
+
+Databases created with create_all from current models already have these indexes,
+so each one is skipped if it is already there.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2025-10-05
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_images_user_id_created_at_id", "images", ["user_id", "created_at", "id"]),
+    ("ix_images_campaign_id", "images", ["campaign_id"]),
+    ("ix_campaigns_user_id_created_at_id", "campaigns", ["user_id", "created_at", "id"]),
+]
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    for name, table, columns in INDEXES:
+        if name not in {index["name"] for index in inspector.get_indexes(table)}:
+            op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
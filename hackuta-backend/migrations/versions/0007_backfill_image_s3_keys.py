@@ -0,0 +1,66 @@
+"""backfill images.s3_key from the stored presigned URLs
+
+Rows uploaded before s3_key existed only have the presigned URL from upload time, which
+expires after an hour. Their object key is the URL path: uploads/<uuid><ext> (or
+images/<hh>/<sha256><ext> in content-addressed mode), after the bucket name for
+path-style URLs. With s3_key set, the listings re-sign these rows like new uploads.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2025-10-05
+"""
+import re
+from urllib.parse import urlsplit, unquote
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+# Key prefixes written by util.upload_image, matched at the end of the URL path
+KEY_PATTERN = re.compile(r"(?:^|/)((?:uploads/[^/]+)|(?:images/[0-9a-f]{2}/[0-9a-f]{64}[^/]*))$")
+BATCH_SIZE = 500
+
+images = sa.table(
+    "images",
+    sa.column("id", sa.Integer),
+    sa.column("url", sa.Text),
+    sa.column("s3_key", sa.String),
+)
+
+
+def key_from_url(url: str):
+    """Object key of a presigned S3 URL for one of our uploads, or None"""
+    parts = urlsplit(url or "")
+    if parts.scheme not in ("http", "https") or ("X-Amz-" not in parts.query and "Signature=" not in parts.query):
+        return None
+    match = KEY_PATTERN.search(unquote(parts.path))
+    return match.group(1) if match else None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(images.c.id, images.c.url)
+            .where(images.c.s3_key.is_(None), images.c.id > last_id)
+            .order_by(images.c.id)
+            .limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        for image_id, url in rows:
+            key = key_from_url(url)
+            if key:
+                bind.execute(images.update().where(images.c.id == image_id).values(s3_key=key))
+        last_id = rows[-1].id
+
+
+def downgrade() -> None:
+    # Backfilled keys are indistinguishable from keys written at upload time; keep them
+    pass
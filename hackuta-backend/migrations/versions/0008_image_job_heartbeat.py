@@ -0,0 +1,35 @@
+"""images.job_owner and job_heartbeat_at for recovering background jobs
+
+Columns that already exist (e.g. from create_all on newer models) are skipped.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2025-10-05
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+IMAGE_COLUMNS = [
+    sa.Column("job_owner", sa.String(32), nullable=True),
+    sa.Column("job_heartbeat_at", sa.DateTime(), nullable=True),
+]
+
+
+def upgrade() -> None:
+    existing = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("images")}
+    with op.batch_alter_table("images") as batch:
+        for column in IMAGE_COLUMNS:
+            if column.name not in existing:
+                batch.add_column(column)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("images") as batch:
+        for column in reversed(IMAGE_COLUMNS):
+            batch.drop_column(column.name)
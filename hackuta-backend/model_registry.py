@@ -0,0 +1,69 @@
+"""
+Lazy registry for the local inference models used by analyze.py.
+Models are registered with a loader and only loaded on first use (or by the
+background warm-up started in app.py), so importing the API does not block on
+transformer or pickle loading and auth/CRUD routes come up immediately.
+"""
+import asyncio
+import threading
+import time
+from typing import Any, Callable, Dict
+
+
+class ModelRegistry:
+    """Name -> lazily loaded model, with per-model locks and load status for health checks"""
+
+    def __init__(self):
+        self._loaders: Dict[str, Callable[[], Any]] = {}
+        self._models: Dict[str, Any] = {}
+        self._errors: Dict[str, str] = {}
+        self._load_seconds: Dict[str, float] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+
+    def register(self, name: str, loader: Callable[[], Any]) -> None:
+        """Register a zero-argument loader for a model name"""
+        self._loaders[name] = loader
+        self._locks[name] = threading.Lock()
+
+    def get(self, name: str) -> Any:
+        """Return the model, loading it on first use. Concurrent callers wait for a single load."""
+        model = self._models.get(name)
+        if model is not None:
+            return model
+
+        with self._locks[name]:
+            if name not in self._models:
+                start = time.perf_counter()
+                try:
+                    self._models[name] = self._loaders[name]()
+                except Exception as e:
+                    self._errors[name] = str(e)
+                    raise
+                self._errors.pop(name, None)
+                self._load_seconds[name] = round(time.perf_counter() - start, 2)
+                print(f"Loaded model '{name}' in {self._load_seconds[name]}s")
+        return self._models[name]
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """Per-model load state for the health endpoint"""
+        status = {}
+        for name in self._loaders:
+            if name in self._models:
+                status[name] = {"state": "loaded", "load_seconds": self._load_seconds.get(name)}
+            elif name in self._errors:
+                status[name] = {"state": "error", "error": self._errors[name]}
+            else:
+                status[name] = {"state": "not_loaded"}
+        return status
+
+    async def warm_up(self) -> None:
+        """Load every registered model in a worker thread without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        for name in self._loaders:
+            try:
+                await loop.run_in_executor(None, self.get, name)
+            except Exception as e:
+                print(f"Model warm-up failed for '{name}': {e}")
+
+
+registry = ModelRegistry()
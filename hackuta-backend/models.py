@@ -1,7 +1,7 @@
 """
 SQLAlchemy models for the application
 """
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -30,9 +30,16 @@ class Image(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     url = Column(Text, nullable=False)  # Image URL from S3 or external source
+    s3_key = Column(String(1024), nullable=True)  # Set for uploaded images; url is re-signed from it on read
+    thumbnail_key = Column(String(1024), nullable=True)  # Resized derivatives (see imaging.py), filled in after upload
+    preview_key = Column(String(1024), nullable=True)
     filename = Column(String(255), nullable=True)
     content_type = Column(String(100), nullable=True)
+    content_hash = Column(String(64), nullable=True, index=True)  # SHA-256 of the uploaded bytes
     analysis_text = Column(Text, nullable=True)  # AI analysis results
+    analysis_status = Column(String(20), nullable=True)  # queued/running/done/failed for background jobs
+    job_owner = Column(String(32), nullable=True)  # Worker process holding the background job (jobs.WORKER_ID)
+    job_heartbeat_at = Column(DateTime, nullable=True)  # Refreshed by job_owner while the job is pending
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     campaign_id = Column(Integer, ForeignKey("campaigns.id"), nullable=True) # Allow null if not in a campaign
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -43,6 +50,13 @@ class Image(Base):
     # Relationship to campaign
     campaign = relationship("Campaign", back_populates="images")
 
+    __table_args__ = (
+        # Listings filter by owner and page newest first on (created_at, id)
+        Index("ix_images_user_id_created_at_id", "user_id", "created_at", "id"),
+        # Campaign image loads (selectinload) and cascades look up by campaign
+        Index("ix_images_campaign_id", "campaign_id"),
+    )
+
 
 class Campaign(Base):
     """Campaign model - stores campaign data for a user"""
@@ -67,3 +81,16 @@ class Campaign(Base):
         cascade="all, delete-orphan",
         lazy="selectin",
     )
+
+    __table_args__ = (
+        Index("ix_campaigns_user_id_created_at_id", "user_id", "created_at", "id"),
+    )
+
+
+class AnalysisCacheEntry(Base):
+    """Persistent tier of the analysis result cache, keyed by image hash + prompt/model version"""
+    __tablename__ = "analysis_cache"
+
+    cache_key = Column(String(64), primary_key=True)
+    payload = Column(Text, nullable=False)  # JSON-encoded get_analyze_image result
+    created_at = Column(DateTime, default=datetime.utcnow)
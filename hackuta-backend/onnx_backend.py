@@ -0,0 +1,219 @@
+"""
+ONNX Runtime inference backend for MiniLM and toxic-bert.
+
+Exports sentence-transformers/all-MiniLM-L6-v2 and unitary/toxic-bert to ONNX (optionally
+with int8 dynamic quantization) and runs them with ONNX Runtime on CPU. Enable it with
+INFERENCE_BACKEND=onnx; models are exported to ONNX_MODEL_DIR on first use if missing.
+
+Usage:
+    python onnx_backend.py export    # export (and quantize when ONNX_QUANTIZE=true) both models
+    python onnx_backend.py check     # parity against the PyTorch models and the sklearn heads
+"""
+import os
+import sys
+import json
+import glob
+from typing import List, Tuple
+
+import numpy as np
+
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+TOXICITY_MODEL = "unitary/toxic-bert"
+
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "onnx_models"))
+ONNX_QUANTIZE = os.getenv("ONNX_QUANTIZE", "false").lower() in ("1", "true", "yes")
+ONNX_NUM_THREADS = int(os.getenv("ONNX_NUM_THREADS", "0"))  # 0 = let ONNX Runtime decide
+
+
+def _model_path(model_name: str, quantize: bool) -> str:
+    base = model_name.replace("/", "__")
+    return os.path.join(ONNX_MODEL_DIR, f"{base}.int8.onnx" if quantize else f"{base}.onnx")
+
+
+def export_model(model_name: str, classifier: bool = False, quantize: bool = False) -> str:
+    """
+    Export a HuggingFace model to ONNX with dynamic batch/sequence axes.
+    Args:
+        model_name: HuggingFace model id.
+        classifier: Export the sequence-classification head (logits) instead of last_hidden_state.
+        quantize: Also write an int8 dynamically quantized copy and return its path.
+    Returns:
+        Path of the ONNX file to load.
+    """
+    fp32_path = _model_path(model_name, quantize=False)
+    if not os.path.exists(fp32_path):
+        import torch
+        from transformers import AutoTokenizer, AutoModel, AutoModelForSequenceClassification
+
+        os.makedirs(ONNX_MODEL_DIR, exist_ok=True)
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+        model_cls = AutoModelForSequenceClassification if classifier else AutoModel
+        model = model_cls.from_pretrained(model_name)
+        model.eval()
+
+        sample = tokenizer(["export sample text"], return_tensors="pt")
+        input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+        output_name = "logits" if classifier else "last_hidden_state"
+        dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+        dynamic_axes[output_name] = {0: "batch"} if classifier else {0: "batch", 1: "sequence"}
+
+        with torch.no_grad():
+            torch.onnx.export(
+                model,
+                tuple(sample[name] for name in input_names),
+                fp32_path,
+                input_names=input_names,
+                output_names=[output_name],
+                dynamic_axes=dynamic_axes,
+                opset_version=14,
+            )
+        print(f"Exported {model_name} to {fp32_path}")
+
+    if not quantize:
+        return fp32_path
+
+    int8_path = _model_path(model_name, quantize=True)
+    if not os.path.exists(int8_path):
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+
+        quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+        print(f"Quantized {model_name} to {int8_path}")
+    return int8_path
+
+
+def _load_session(model_name: str, classifier: bool, quantize: bool):
+    import onnxruntime as ort
+    from transformers import AutoTokenizer, AutoConfig
+
+    path = export_model(model_name, classifier=classifier, quantize=quantize)
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if ONNX_NUM_THREADS > 0:
+        options.intra_op_num_threads = ONNX_NUM_THREADS
+    session = ort.InferenceSession(path, sess_options=options, providers=["CPUExecutionProvider"])
+    return AutoTokenizer.from_pretrained(model_name), AutoConfig.from_pretrained(model_name), session
+
+
+def _run(tokenizer, session, texts: List[str], output_name: str) -> Tuple[np.ndarray, np.ndarray]:
+    inputs = tokenizer(list(texts), return_tensors="np", truncation=True, padding=True)
+    feed = {i.name: inputs[i.name].astype(np.int64) for i in session.get_inputs()}
+    return session.run([output_name], feed)[0], inputs["attention_mask"]
+
+
+class OnnxEncoder:
+    """Drop-in for embedding_service.TorchEncoder: masked mean-pooled MiniLM embeddings via ONNX Runtime"""
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL, quantize: bool = ONNX_QUANTIZE):
+        self.name = "onnx-int8" if quantize else "onnx"
+        self._tokenizer, config, self._session = _load_session(model_name, classifier=False, quantize=quantize)
+        self.dim = config.hidden_size
+
+    def __call__(self, texts: List[str]) -> np.ndarray:
+        hidden, attention_mask = _run(self._tokenizer, self._session, texts, "last_hidden_state")
+        mask = attention_mask[..., None].astype(hidden.dtype)
+        return (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1, None)
+
+
+class OnnxToxicityScorer:
+    """Drop-in for inference.TorchToxicityScorer: top-label toxic-bert score via ONNX Runtime"""
+
+    def __init__(self, model_name: str = TOXICITY_MODEL, quantize: bool = ONNX_QUANTIZE):
+        self._tokenizer, config, self._session = _load_session(model_name, classifier=True, quantize=quantize)
+        # Same activation the transformers text-classification pipeline picks for this config
+        self._sigmoid = config.problem_type == "multi_label_classification" or config.num_labels == 1
+
+    def __call__(self, texts: List[str]) -> np.ndarray:
+        texts = list(texts)
+        if not texts:
+            return np.zeros(0)
+        logits, _ = _run(self._tokenizer, self._session, texts, "logits")
+        if self._sigmoid:
+            probs = 1 / (1 + np.exp(-logits))
+        else:
+            exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+            probs = exp / exp.sum(axis=1, keepdims=True)
+        return probs.max(axis=1)
+
+
+def _sample_texts(limit: int = 64) -> List[str]:
+    texts = []
+    pattern = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ml", "datasets", "comment_labels", "*.json")
+    for path in sorted(glob.glob(pattern)):
+        with open(path) as f:
+            texts.extend(row["text"] for row in json.load(f))
+    return texts[:limit] or ["Love this!", "Not sure about the price though.", "Is it durable?"]
+
+
+def check_parity(quantize: bool = ONNX_QUANTIZE) -> bool:
+    """
+    Compare ONNX outputs against the PyTorch models on the labelled comment dataset,
+    including the downstream sklearn comment-sentiment and ad-receptiveness predictions.
+    """
+    import emoji
+    from textblob import TextBlob
+    from inference import TorchToxicityScorer, LocalInference
+    from embedding_service import TorchEncoder
+    from analyze import CommentFeatures
+
+    texts = _sample_texts()
+    torch_emb = TorchEncoder()(texts)
+    onnx_emb = OnnxEncoder(quantize=quantize)(texts)
+    cosine = (torch_emb * onnx_emb).sum(axis=1) / (
+        np.linalg.norm(torch_emb, axis=1) * np.linalg.norm(onnx_emb, axis=1)
+    )
+
+    torch_tox = TorchToxicityScorer()(texts)
+    onnx_tox = OnnxToxicityScorer(quantize=quantize)(texts)
+
+    def comment_matrix(embeddings, toxicity):
+        rows = []
+        for text, emb, tox in zip(texts, embeddings, toxicity):
+            rows.append(CommentFeatures(
+                text=text,
+                embedding=emb,
+                polarity=TextBlob(text).sentiment.polarity,
+                emoji_count=len(emoji.emoji_list(text)),
+                question_flag=int("?" in text),
+                toxicity=float(tox),
+            ).vector())
+        return np.vstack(rows)
+
+    heads = LocalInference()
+    torch_proba = heads.comment_proba(comment_matrix(torch_emb, torch_tox))
+    onnx_proba = heads.comment_proba(comment_matrix(onnx_emb, onnx_tox))
+    label_agreement = float((torch_proba.argmax(axis=1) == onnx_proba.argmax(axis=1)).mean())
+
+    sentiment = (torch_proba[:, 2] - torch_proba[:, 0]).reshape(-1, 1)
+    torch_recept = heads.ad_receptiveness(np.hstack([torch_emb, sentiment]))
+    onnx_recept = heads.ad_receptiveness(np.hstack([onnx_emb, sentiment]))
+
+    # Quantized models trade a little accuracy for speed, so they get looser bounds
+    min_cosine, max_tox_diff, min_agreement, max_recept_diff = (0.99, 0.05, 0.95, 0.05) if quantize else (0.9999, 1e-3, 1.0, 1e-3)
+    report = {
+        "texts": len(texts),
+        "min_embedding_cosine": float(cosine.min()),
+        "max_toxicity_abs_diff": float(np.abs(torch_tox - onnx_tox).max()),
+        "sentiment_label_agreement": label_agreement,
+        "max_receptiveness_abs_diff": float(np.abs(torch_recept - onnx_recept).max()),
+    }
+    ok = (
+        report["min_embedding_cosine"] >= min_cosine
+        and report["max_toxicity_abs_diff"] <= max_tox_diff
+        and report["sentiment_label_agreement"] >= min_agreement
+        and report["max_receptiveness_abs_diff"] <= max_recept_diff
+    )
+    print(json.dumps(report, indent=2))
+    print("PARITY OK" if ok else "PARITY FAILED")
+    return ok
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    if command == "export":
+        export_model(EMBEDDING_MODEL, quantize=ONNX_QUANTIZE)
+        export_model(TOXICITY_MODEL, classifier=True, quantize=ONNX_QUANTIZE)
+    elif command == "check":
+        sys.exit(0 if check_parity() else 1)
+    else:
+        print("Usage: python onnx_backend.py {export|check}")
+        sys.exit(2)
@@ -12,13 +12,16 @@ class ImageCreateRequest(BaseModel):
     content_type: Optional[str] = None
     analysis_text: Optional[str] = None
 
-class ImageResponse(BaseModel):
-    """Response model for image data"""
+class ImageSummaryResponse(BaseModel):
+    """Image data without the analysis text (fields=summary on list endpoints)"""
     id: int
     url: str
+    thumbnail_url: Optional[str] = None
+    preview_url: Optional[str] = None
     filename: Optional[str]
     content_type: Optional[str]
-    analysis_text: Optional[str]
+    content_hash: Optional[str] = None
+    analysis_status: Optional[str] = None
     user_id: int
     campaign_id: Optional[int] = None
     created_at: datetime
@@ -27,6 +30,10 @@ class ImageResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class ImageResponse(ImageSummaryResponse):
+    """Response model for image data"""
+    analysis_text: Optional[str]
+
 class UserResponse(BaseModel):
     """Response model for user data"""
     id: int
@@ -48,10 +55,40 @@ class Analytics(BaseModel):
     resonance: float
 
 
+class CommentScore(BaseModel):
+    """Sentiment and toxicity scores for a single generated comment"""
+    comment: str
+    score: float
+    toxicity: float
+
+
 class AnalyzeImageResponse(BaseModel):
     """Response model for analyze image endpoint including analytics"""
     image: ImageResponse
     analytics: Analytics
+    comments: list[CommentScore] = []
+
+
+class BulkAnalyzeError(BaseModel):
+    """A file or key from a bulk request that could not be stored"""
+    filename: Optional[str] = None
+    detail: str
+
+
+class BulkAnalyzeResponse(BaseModel):
+    """Response model for bulk campaign analysis; results keep the request order"""
+    results: list[AnalyzeImageResponse] = []
+    errors: list[BulkAnalyzeError] = []
+
+
+class AnalysisJobResponse(BaseModel):
+    """Status of a background analysis job; analytics and comments are set once it is done"""
+    job_id: str
+    status: str
+    image_id: int
+    analytics: Optional[Analytics] = None
+    comments: list[CommentScore] = []
+    error: Optional[str] = None
 
 
 class CampaignCreate(BaseModel):
@@ -76,3 +113,8 @@ class CampaignResponse(BaseModel):
     
     class Config:
         from_attributes = True
+
+
+class CampaignSummaryResponse(CampaignResponse):
+    """Campaign with image summaries (fields=summary)"""
+    images: list[ImageSummaryResponse] = []
@@ -3,6 +3,10 @@ Session management for authentication
 Simple cookie-based sessions
 """
 import os
+import time
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
 from typing import Optional
 from fastapi import Request, Response, HTTPException, status
 from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
@@ -19,6 +23,53 @@ SESSION_MAX_AGE = 60 * 60 * 24 * 7  # 7 days
 # Serializer for signing session data
 serializer = URLSafeTimedSerializer(SECRET_KEY)
 
+# Per-process cache of OAuth sub -> user row, so protected routes skip the users lookup.
+# Entries are dropped on login (/auth/callback upserts the row) and expire after USER_CACHE_TTL.
+USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", "300"))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+
+
+@dataclass(frozen=True)
+class SessionUser:
+    """The authenticated user's essential fields, as returned by get_current_user_from_session"""
+    id: int
+    user_id: str
+    email: Optional[str]
+    name: Optional[str]
+
+
+_user_cache: "OrderedDict[str, tuple]" = OrderedDict()
+_user_cache_lock = threading.Lock()
+
+
+def _get_cached_user(sub: str) -> Optional[SessionUser]:
+    with _user_cache_lock:
+        entry = _user_cache.get(sub)
+        if entry is None:
+            return None
+        user, expires_at = entry
+        if expires_at <= time.monotonic():
+            del _user_cache[sub]
+            return None
+        _user_cache.move_to_end(sub)
+        return user
+
+
+def _cache_user(user: SessionUser) -> None:
+    if USER_CACHE_TTL <= 0 or USER_CACHE_SIZE <= 0:
+        return
+    with _user_cache_lock:
+        _user_cache[user.user_id] = (user, time.monotonic() + USER_CACHE_TTL)
+        _user_cache.move_to_end(user.user_id)
+        while len(_user_cache) > USER_CACHE_SIZE:
+            _user_cache.popitem(last=False)
+
+
+def invalidate_cached_user(sub: str) -> None:
+    """Drop a user from the cache after their row changes"""
+    with _user_cache_lock:
+        _user_cache.pop(sub, None)
+
 
 def create_session_token(user_data: dict) -> str:
     """Create a signed session token"""
@@ -72,10 +123,11 @@ async def get_session_user(request: Request) -> Optional[dict]:
 async def get_current_user_from_session(
     request: Request,
     db: AsyncSession
-) -> User:
+) -> SessionUser:
     """
     Get current user from session token in Authorization header
-    Dependency for protected routes
+    Dependency for protected routes. The users lookup is cached per process (see USER_CACHE_TTL),
+    so the result is a plain SessionUser rather than a row attached to db.
     """
     # Check Authorization header
     auth_header = request.headers.get("Authorization")
@@ -101,6 +153,10 @@ async def get_current_user_from_session(
             detail="Invalid session"
         )
     
+    cached = _get_cached_user(user_id)
+    if cached is not None:
+        return cached
+    
     # Get user from database
     result = await db.execute(select(User).where(User.user_id == user_id))
     user = result.scalar_one_or_none()
@@ -111,4 +167,6 @@ async def get_current_user_from_session(
             detail="User not found"
         )
     
-    return user
+    session_user = SessionUser(id=user.id, user_id=user.user_id, email=user.email, name=user.name)
+    _cache_user(session_user)
+    return session_user
@@ -1,18 +1,116 @@
 from boto3 import client
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from botocore.exceptions import ClientError
 import os
 import uuid
-from typing import BinaryIO, Union, Dict
+import hashlib
+import threading
+import asyncio
+import functools
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Union, Dict, Iterable
 from io import BytesIO
 
-def upload_image(file_obj: BinaryIO, bucket: str, filename: str, key: Union[str, None] = None, content_type: Union[str, None] = None) -> Dict[str, str]:
+# Shared S3 client settings (one client per process, reused by every helper below)
+S3_MAX_POOL_CONNECTIONS = int(os.getenv("S3_MAX_POOL_CONNECTIONS", "32"))
+S3_MAX_ATTEMPTS = int(os.getenv("S3_MAX_ATTEMPTS", "3"))
+S3_CONNECT_TIMEOUT = float(os.getenv("S3_CONNECT_TIMEOUT", "5"))
+S3_READ_TIMEOUT = float(os.getenv("S3_READ_TIMEOUT", "30"))
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL")  # e.g. a local moto/MinIO server
+
+# Multipart settings for upload_fileobj: large files are streamed in chunks, in parallel
+S3_MULTIPART_THRESHOLD_MB = int(os.getenv("S3_MULTIPART_THRESHOLD_MB", "8"))
+S3_MULTIPART_CHUNK_MB = int(os.getenv("S3_MULTIPART_CHUNK_MB", "8"))
+S3_TRANSFER_CONCURRENCY = int(os.getenv("S3_TRANSFER_CONCURRENCY", "4"))
+TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=S3_MULTIPART_THRESHOLD_MB * 1024 * 1024,
+    multipart_chunksize=S3_MULTIPART_CHUNK_MB * 1024 * 1024,
+    max_concurrency=S3_TRANSFER_CONCURRENCY,
+)
+
+# Content-addressed mode: keys are derived from the SHA-256 of the bytes, so identical
+# uploads map to the same object and re-uploads are skipped after a HEAD check
+S3_CONTENT_ADDRESSED = os.getenv("S3_CONTENT_ADDRESSED", "false").lower() in ("1", "true", "yes")
+
+# Presigned GET URLs handed to clients; cached entries expire S3_PRESIGN_CACHE_MARGIN seconds
+# before the URL does, so a cached URL always has at least that long left to live
+S3_PRESIGN_EXPIRES = int(os.getenv("S3_PRESIGN_EXPIRES", "3600"))
+S3_PRESIGN_CACHE_MARGIN = int(os.getenv("S3_PRESIGN_CACHE_MARGIN", "600"))
+S3_PRESIGN_CACHE_SIZE = int(os.getenv("S3_PRESIGN_CACHE_SIZE", "10000"))
+
+_s3_client = None
+_s3_client_lock = threading.Lock()
+
+# Blocking boto3 calls made from async code run here, never on the event loop
+_s3_executor = ThreadPoolExecutor(max_workers=S3_MAX_POOL_CONNECTIONS, thread_name_prefix="s3")
+
+
+def get_s3_client():
+    """
+    Return the process-wide S3 client, creating it on first use.
+    boto3 clients are thread-safe, so one client with a keep-alive connection pool is
+    shared instead of resolving credentials and endpoints on every call.
     """
-    Upload a file object directly to S3.
+    global _s3_client
+    if _s3_client is None:
+        with _s3_client_lock:
+            if _s3_client is None:
+                config = Config(
+                    max_pool_connections=S3_MAX_POOL_CONNECTIONS,
+                    retries={"max_attempts": S3_MAX_ATTEMPTS, "mode": "adaptive"},
+                    connect_timeout=S3_CONNECT_TIMEOUT,
+                    read_timeout=S3_READ_TIMEOUT,
+                    tcp_keepalive=True,
+                )
+                _s3_client = client("s3", endpoint_url=S3_ENDPOINT_URL, config=config)
+    return _s3_client
+
+def content_addressed_key(digest: str, filename: str) -> str:
+    """
+    Object key for content-addressed storage, e.g. "images/ab/ab12...ef.png".
     Args:
-        file_obj: File object to upload (e.g., from FastAPI UploadFile.file).
+        digest: SHA-256 hex digest of the file bytes (see content_hash).
+        filename: Original filename to extract extension.
+    Returns:
+        Deterministic S3 object key for these bytes.
+    """
+    ext = os.path.splitext(filename)[1].lower()
+    return f"images/{digest[:2]}/{digest}{ext}"
+
+def object_exists(bucket: str, key: str) -> bool:
+    """
+    Check whether an object exists in S3 with a HEAD request.
+    Args:
+        bucket: S3 bucket name.
+        key: S3 object key.
+    Returns:
+        True if the object exists, False if S3 reports it missing.
+    Raises:
+        RuntimeError: If the HEAD request fails for any other reason.
+    """
+    s3 = get_s3_client()
+    try:
+        s3.head_object(Bucket=bucket, Key=key)
+        return True
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+            return False
+        raise RuntimeError(f"Failed to check s3://{bucket}/{key}: {e}") from e
+
+def upload_image(file_obj: BinaryIO, bucket: str, filename: str, key: Union[str, None] = None, content_type: Union[str, None] = None, digest: Union[str, None] = None) -> Dict[str, str]:
+    """
+    Upload a file object directly to S3, streaming it with multipart upload when large.
+    Args:
+        file_obj: File object to upload (e.g., from FastAPI UploadFile.file), read from its current position.
         bucket: Target S3 bucket name.
         filename: Original filename to extract extension.
         key: Desired object key (optional). If None, one is generated.
         content_type: MIME type (optional).
+        digest: SHA-256 hex digest of the bytes (optional). With S3_CONTENT_ADDRESSED enabled and
+            no explicit key, the key is derived from it and the upload is skipped if the object exists.
     Returns:
         Dictionary containing the S3 object key and presigned URL:
         {
@@ -21,9 +119,13 @@ def upload_image(file_obj: BinaryIO, bucket: str, filename: str, key: Union[str,
         }
     """
 
-    s3 = client("s3")
+    s3 = get_s3_client()
 
-    if key is None:
+    already_stored = False
+    if key is None and digest and S3_CONTENT_ADDRESSED:
+        key = content_addressed_key(digest, filename)
+        already_stored = object_exists(bucket, key)
+    elif key is None:
         ext = os.path.splitext(filename)[1]
         key = f"uploads/{uuid.uuid4()}{ext}"
 
@@ -31,23 +133,17 @@ def upload_image(file_obj: BinaryIO, bucket: str, filename: str, key: Union[str,
     if content_type:
         extra_args["ContentType"] = content_type
 
-    try:
-        if extra_args:
-            s3.upload_fileobj(file_obj, bucket, key, ExtraArgs=extra_args)
-        else:
-            s3.upload_fileobj(file_obj, bucket, key)
-    except Exception as e:
-        raise RuntimeError(f"Failed to upload {filename} to s3://{bucket}/{key}: {e}") from e
+    if not already_stored:
+        try:
+            if extra_args:
+                s3.upload_fileobj(file_obj, bucket, key, ExtraArgs=extra_args, Config=TRANSFER_CONFIG)
+            else:
+                s3.upload_fileobj(file_obj, bucket, key, Config=TRANSFER_CONFIG)
+        except Exception as e:
+            raise RuntimeError(f"Failed to upload {filename} to s3://{bucket}/{key}: {e}") from e
     
-    # Generate presigned URL for the uploaded image
-    try:
-        url = s3.generate_presigned_url(
-            'get_object',
-            Params={'Bucket': bucket, 'Key': key},
-            ExpiresIn=3600  # 1 hour expiration
-        )
-    except Exception as e:
-        raise RuntimeError(f"Failed to generate presigned URL for uploaded image s3://{bucket}/{key}: {e}") from e
+    # Presigned URL for the immediate response; stored rows are re-signed on read
+    url = presign_urls(bucket, [key])[key]
     
     return {
         "key": key,
@@ -66,7 +162,7 @@ def download_image(bucket: str, key: str) -> BytesIO:
         RuntimeError: If the download fails.
     """
     
-    s3 = client("s3")
+    s3 = get_s3_client()
     
     try:
         # Create a BytesIO buffer to store the downloaded data
@@ -96,7 +192,7 @@ def get_image_url(bucket: str, key: str, expiration: int = 3600) -> str:
         RuntimeError: If URL generation fails.
     """
     
-    s3 = client("s3")
+    s3 = get_s3_client()
     
     try:
         url = s3.generate_presigned_url(
@@ -108,3 +204,153 @@ def get_image_url(bucket: str, key: str, expiration: int = 3600) -> str:
         
     except Exception as e:
         raise RuntimeError(f"Failed to generate presigned URL for s3://{bucket}/{key}: {e}") from e
+
+_presign_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+_presign_cache_lock = threading.Lock()
+
+
+def presign_urls(bucket: str, keys: Iterable[str]) -> Dict[str, str]:
+    """
+    Presigned GET URLs for many objects at once, served from a TTL cache.
+    Signing is done locally by the shared client (no request to S3), and each URL is
+    reused until S3_PRESIGN_CACHE_MARGIN seconds before it expires.
+    Args:
+        bucket: S3 bucket name containing the objects.
+        keys: S3 object keys; duplicates are signed once.
+    Returns:
+        Dictionary mapping each key to its presigned URL.
+    Raises:
+        RuntimeError: If URL generation fails.
+    """
+    now = time.monotonic()
+    urls = {}
+    missing = []
+    with _presign_cache_lock:
+        for key in keys:
+            if key in urls:
+                continue
+            entry = _presign_cache.get((bucket, key))
+            if entry is not None and entry[1] > now:
+                _presign_cache.move_to_end((bucket, key))
+                urls[key] = entry[0]
+            else:
+                urls[key] = None
+                missing.append(key)
+
+    if missing:
+        s3 = get_s3_client()
+        ttl = max(S3_PRESIGN_EXPIRES - S3_PRESIGN_CACHE_MARGIN, 0)
+        signed = {}
+        for key in missing:
+            try:
+                signed[key] = s3.generate_presigned_url(
+                    'get_object',
+                    Params={'Bucket': bucket, 'Key': key},
+                    ExpiresIn=S3_PRESIGN_EXPIRES
+                )
+            except Exception as e:
+                raise RuntimeError(f"Failed to generate presigned URL for s3://{bucket}/{key}: {e}") from e
+        with _presign_cache_lock:
+            for key, url in signed.items():
+                _presign_cache[(bucket, key)] = (url, now + ttl)
+                _presign_cache.move_to_end((bucket, key))
+            while len(_presign_cache) > S3_PRESIGN_CACHE_SIZE:
+                _presign_cache.popitem(last=False)
+        urls.update(signed)
+    return urls
+
+
+async def _run_s3(func, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_s3_executor, functools.partial(func, *args, **kwargs))
+
+
+async def upload_image_async(file_obj: BinaryIO, bucket: str, filename: str, key: Union[str, None] = None, content_type: Union[str, None] = None, digest: Union[str, None] = None) -> Dict[str, str]:
+    """
+    Async variant of upload_image; the upload runs on the S3 thread pool.
+    Returns the same {"key", "url"} dictionary.
+    If the caller is cancelled, an upload still waiting for a thread never starts, and one
+    already transferring has its object removed once it lands (see discard_object).
+    """
+    future = _s3_executor.submit(functools.partial(upload_image, file_obj, bucket, filename, key=key, content_type=content_type, digest=digest))
+    result = asyncio.wrap_future(future)
+    try:
+        return await asyncio.shield(result)
+    except asyncio.CancelledError:
+        if not future.cancel():
+            result.add_done_callback(functools.partial(_discard_finished_upload, bucket))
+        raise
+
+
+def _discard_finished_upload(bucket: str, result: "asyncio.Future") -> None:
+    if result.cancelled():
+        return
+    if result.exception() is not None:
+        print(f"Abandoned upload failed: {result.exception()}")
+        return
+    discard_object(bucket, result.result()["key"])
+
+
+def delete_image(bucket: str, key: str) -> None:
+    """
+    Delete an object from S3.
+    Args:
+        bucket: S3 bucket name.
+        key: S3 object key of the image.
+    """
+    try:
+        get_s3_client().delete_object(Bucket=bucket, Key=key)
+    except Exception as e:
+        raise RuntimeError(f"Failed to delete s3://{bucket}/{key}: {e}") from e
+
+
+def _delete_quietly(bucket: str, key: str) -> None:
+    try:
+        delete_image(bucket, key)
+    except RuntimeError as e:
+        print(e)
+
+
+def discard_object(bucket: str, key: str) -> None:
+    """
+    Delete, in the background, an uploaded object that will never be recorded.
+    Content-addressed objects may be shared with other rows, so only per-upload keys are removed.
+    """
+    if key.startswith("uploads/"):
+        _s3_executor.submit(_delete_quietly, bucket, key)
+
+
+def discard_upload(task: "asyncio.Task", bucket: str) -> None:
+    """
+    Clean up an upload_image_async task whose result will not be stored: cancel it if it is
+    still running, or discard the object if it already finished. Never raises.
+    """
+    if not task.done():
+        task.cancel()
+    elif not task.cancelled() and task.exception() is None:
+        discard_object(bucket, task.result()["key"])
+
+
+async def download_image_async(bucket: str, key: str) -> BytesIO:
+    """
+    Async variant of download_image; the download runs on the S3 thread pool.
+    """
+    return await _run_s3(download_image, bucket, key)
+
+
+async def get_image_url_async(bucket: str, key: str, expiration: int = 3600) -> str:
+    """
+    Async variant of get_image_url.
+    """
+    return await _run_s3(get_image_url, bucket, key, expiration)
+
+
+def content_hash(data: bytes) -> str:
+    """
+    SHA-256 hex digest of raw bytes, used to identify identical uploads.
+    Args:
+        data: Raw file bytes.
+    Returns:
+        64-character lowercase hex digest.
+    """
+    return hashlib.sha256(data).hexdigest()
@@ -20,6 +20,7 @@ import {
   updateCampaign,
   deleteImage,
   updateImage,
+  getImage,
 } from "@/lib/api";
 
 interface CampaignDetailPageProps {
@@ -134,6 +135,11 @@ export default function CampaignDetailPage() {
   );
   const fileInputRef1 = useRef<HTMLInputElement>(null);
   const fileInputRef2 = useRef<HTMLInputElement>(null);
+  // Insight text fetched for ads that came from a summary listing
+  const [loadedInsights, setLoadedInsights] = useState<Record<string, string>>(
+    {}
+  );
+  const requestedInsights = useRef<Set<string>>(new Set());
 
   // Auto-save campaign name and description with debounce
   useEffect(() => {
@@ -169,6 +175,32 @@ export default function CampaignDetailPage() {
     return () => clearTimeout(timer);
   }, [displayDescription, campaign, campaignId]);
 
+  // The dashboard lists campaigns with image summaries (no analysis_text), so load the
+  // insight of each server-side ad shown here
+  useEffect(() => {
+    const missing = (campaign?.ads ?? []).filter(
+      (ad) =>
+        ad.initialInsight === undefined &&
+        /^\d+$/.test(ad.id) &&
+        !requestedInsights.current.has(ad.id)
+    );
+    for (const ad of missing) {
+      requestedInsights.current.add(ad.id);
+      getImage(Number(ad.id))
+        .then((image) => {
+          if (image.analysis_text) {
+            setLoadedInsights((prev) => ({
+              ...prev,
+              [ad.id]: image.analysis_text as string,
+            }));
+          }
+        })
+        .catch((error) => {
+          console.error("Failed to load insight:", error);
+        });
+    }
+  }, [campaign?.ads]);
+
   // Now that all hooks are declared, we can safely return if the campaign is not found.
   if (!campaign) {
     return (
@@ -968,7 +1000,9 @@ export default function CampaignDetailPage() {
                     </p>
                     {status === "not_deployed" && (
                       <p className="mt-2 text-sm text-slate-600 whitespace-pre-line">
-                        {ad.initialInsight ?? "Awaiting initial insights."}
+                        {ad.initialInsight ??
+                          loadedInsights[ad.id] ??
+                          "Awaiting initial insights."}
                       </p>
                     )}
                     {status === "processing" && (
@@ -979,7 +1013,7 @@ export default function CampaignDetailPage() {
                     )}
                     {status === "ready" && (
                       <div className="mt-2 space-y-3 text-sm text-slate-700">
-                        <p>{ad.initialInsight}</p>
+                        <p>{ad.initialInsight ?? loadedInsights[ad.id]}</p>
                       </div>
                     )}
                   </div>
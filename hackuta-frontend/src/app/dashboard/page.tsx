@@ -3,16 +3,39 @@
 import { PlusCircle } from "lucide-react";
 import Link from "next/link";
 import { useRouter } from "next/navigation";
-import { useEffect } from "react";
+import { useCallback, useEffect, useState } from "react";
 
 import { CampaignPanel } from "@/components/CampaignPanel";
 import { Header } from "@/components/Header";
 import { useAuth } from "@/context/AuthContext";
-import { useCampaigns } from "@/context/CampaignContext";
+import { CampaignEntry, useCampaigns } from "@/context/CampaignContext";
 import { getCampaigns, getImages } from "@/lib/api";
 import { CampaignResponse } from "@/lib/api";
 import { logout } from "@/lib/api";
 
+function toCampaignEntry(c: CampaignResponse): CampaignEntry {
+  return {
+    id: String(c.id),
+    name: c.name,
+    description: c.description,
+    contextAnswers: {
+      emotion: c.emotion ?? undefined,
+      success: c.success ?? undefined,
+      inspiration: c.inspiration ?? undefined,
+    },
+    createdAt: c.created_at,
+    ads: (c.images || []).map((img) => ({
+      id: String(img.id),
+      campaignId: String(c.id),
+      createdAt: img.created_at,
+      src: img.thumbnail_url ?? img.url,
+      fileName: img.filename,
+      // Summaries carry no analysis_text; the campaign page loads it per ad
+      initialInsight: img.analysis_text,
+    })),
+  };
+}
+
 function CreateCampaignCTA({ onClick }: { onClick: () => void }) {
   return (
     <button
@@ -36,31 +59,15 @@ export default function DashboardPage() {
   const { user } = useAuth();
   const router = useRouter();
   const hasCampaigns = campaigns.length > 0;
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     const loadCampaigns = async () => {
       try {
-        const apiCampaigns = await getCampaigns();
-        const mapped = apiCampaigns.map((c) => ({
-          id: String(c.id),
-          name: c.name,
-          description: c.description,
-          contextAnswers: {
-            emotion: c.emotion ?? undefined,
-            success: c.success ?? undefined,
-            inspiration: c.inspiration ?? undefined,
-          },
-          createdAt: c.created_at,
-          ads: (c.images || []).map((img) => ({
-            id: String(img.id),
-            campaignId: String(c.id),
-            createdAt: img.created_at,
-            src: img.url,
-            fileName: img.filename,
-            initialInsight: img.analysis_text,
-          })),
-        }));
-        setCampaignList(mapped);
+        const page = await getCampaigns();
+        setCampaignList(page.items.map(toCampaignEntry));
+        setNextCursor(page.nextCursor);
       } catch (e) {
         // noop: keep empty state on failure
       }
@@ -71,6 +78,21 @@ export default function DashboardPage() {
     }
   }, [user, setCampaignList]);
 
+  // Later pages are only fetched when asked for
+  const loadMoreCampaigns = useCallback(async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const page = await getCampaigns(nextCursor);
+      setCampaignList([...campaigns, ...page.items.map(toCampaignEntry)]);
+      setNextCursor(page.nextCursor);
+    } catch (e) {
+      console.error("Failed to load more campaigns", e);
+    } finally {
+      setLoadingMore(false);
+    }
+  }, [nextCursor, campaigns, setCampaignList]);
+
   return (
     <div className="relative flex min-h-screen flex-col overflow-hidden bg-background text-foreground">
       <DashboardHeader />
@@ -108,6 +130,16 @@ export default function DashboardPage() {
                 {campaigns.map((campaign) => (
                   <CampaignPanel key={campaign.id} campaign={campaign} />
                 ))}
+                {nextCursor ? (
+                  <button
+                    type="button"
+                    onClick={loadMoreCampaigns}
+                    disabled={loadingMore}
+                    className="mx-auto rounded-lg bg-slate-100 px-4 py-2 text-sm font-semibold text-slate-700 transition-colors hover:bg-slate-200 disabled:opacity-50"
+                  >
+                    {loadingMore ? "Loading…" : "Load more campaigns"}
+                  </button>
+                ) : null}
                 <CreateCampaignCTA
                   onClick={() => router.push("/dashboard/new-campaign")}
                 />
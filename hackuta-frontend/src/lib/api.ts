@@ -14,6 +14,8 @@ export interface User {
 export interface Image {
   id: number;
   url: string;
+  thumbnail_url?: string | null;
+  preview_url?: string | null;
   filename: string;
   content_type: string;
   analysis_text?: string;
@@ -54,6 +56,11 @@ export interface CampaignResponse {
   images: Image[];
 }
 
+export interface Page<T> {
+  items: T[];
+  nextCursor: string | null;
+}
+
 export interface ImageData {
   url: string;
   filename: string;
@@ -203,21 +210,49 @@ export async function logout(): Promise<void> {
   await destroySession();
 }
 
-export async function getImages(): Promise<Image[]> {
-  try {
-    const response = await authorizedFetch(`${API_BASE_URL}/images`);
-
-    if (!response.ok) {
-      throw new Error("Failed to fetch images");
-    }
+// List endpoints are paginated: the cursor for the next page comes back in X-Next-Cursor.
+// Callers fetch one page at a time and pass nextCursor back in when they need more.
+async function fetchPage<T>(
+  url: string,
+  cursor: string | null | undefined,
+  errorMessage: string
+): Promise<Page<T>> {
+  const pageUrl = new URL(url);
+  if (cursor) pageUrl.searchParams.set("cursor", cursor);
+
+  const response = await authorizedFetch(pageUrl.toString());
+  if (!response.ok) {
+    throw new Error(errorMessage);
+  }
+  return {
+    items: (await response.json()) as T[],
+    nextCursor: response.headers.get("X-Next-Cursor"),
+  };
+}
 
-    return (await response.json()) as Image[];
+// List views only show thumbnails, so images come without analysis_text (fields=summary);
+// use getImage for the full record
+export async function getImages(cursor?: string | null): Promise<Page<Image>> {
+  try {
+    return await fetchPage<Image>(
+      `${API_BASE_URL}/images?fields=summary`,
+      cursor,
+      "Failed to fetch images"
+    );
   } catch (error) {
     console.error("Error fetching images", error);
-    return [];
+    return { items: [], nextCursor: null };
   }
 }
 
+export async function getImage(imageId: number): Promise<Image> {
+  const response = await authorizedFetch(`${API_BASE_URL}/images/${imageId}`);
+  if (!response.ok) {
+    throw new Error("Failed to fetch image");
+  }
+  return (await response.json()) as Image;
+}
+
 export async function createImage(imageData: ImageData): Promise<Image> {
   const response = await authorizedFetch(`${API_BASE_URL}/images`, {
     method: "POST",
@@ -262,12 +297,14 @@ export const apiClient = {
   uploadAndAnalyzeImage,
 };
 
-export async function getCampaigns(): Promise<CampaignResponse[]> {
-  const response = await authorizedFetch(`${API_BASE_URL}/campaigns`);
-  if (!response.ok) {
-    throw new Error("Failed to fetch campaigns");
-  }
-  return (await response.json()) as CampaignResponse[];
+export async function getCampaigns(
+  cursor?: string | null
+): Promise<Page<CampaignResponse>> {
+  return fetchPage<CampaignResponse>(
+    `${API_BASE_URL}/campaigns?include_images=true&fields=summary`,
+    cursor,
+    "Failed to fetch campaigns"
+  );
 }
 
 export async function createCampaign(
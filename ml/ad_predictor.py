@@ -1,11 +1,11 @@
 from pathlib import Path
 import pandas as pd
 import numpy as np
-import torch
-from transformers import AutoTokenizer, AutoModel, pipeline
+from transformers import pipeline
 from textblob import TextBlob
 import emoji
 import joblib
+from embedding_service import EmbeddingService
 
 model = joblib.load("saved_models/comment_sentiment_model.pkl")
 
@@ -16,15 +16,11 @@ path = Path(root_path)
 for item in path.iterdir():
     df.append(pd.read_json(item))
 df = pd.concat(df, ignore_index=True)
-tokenizer = AutoTokenizer.from_pretrained("sentence-transformers/all-MiniLM-L6-v2")
-embed_model = AutoModel.from_pretrained("sentence-transformers/all-MiniLM-L6-v2")
+embedding_service = EmbeddingService(store_dir="embedding_store")
 toxicity_model = pipeline("text-classification", model="unitary/toxic-bert")
 
 def get_features(text):
-    tokens = tokenizer(text, return_tensors="pt", truncation=True, padding=True)
-    with torch.no_grad():
-        output = embed_model(**tokens)
-    emb = output.last_hidden_state.mean(dim=1).squeeze().numpy()
+    emb = embedding_service.embed(text)
 
     sentiment_polarity = TextBlob(text).sentiment.polarity
     emoji_count = len(emoji.emoji_list(text))
@@ -0,0 +1,290 @@
+"""
+Shared MiniLM sentence-embedding service.
+
+Wraps sentence-transformers/all-MiniLM-L6-v2 mean-pooled embeddings behind a bounded LRU
+keyed by normalized text, with an optional on-disk store (memory-mapped float32 matrix plus an
+append-only key log) so repeated comments, ad copy and training reruns never re-embed the same text.
+Used by the backend (hackuta-backend/analyze.py) and the training/prediction scripts here.
+"""
+import os
+import json
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Iterable, List, Optional
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: the disk store is then only safe within a single process
+    fcntl = None
+
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+def normalize_text(text: str) -> str:
+    """Cache key for a text; the MiniLM tokenizer splits on whitespace, so collapsing it is lossless"""
+    return " ".join(str(text).split())
+
+
+class EmbeddingStore:
+    """
+    Append-only on-disk embedding store, safe to share between processes (e.g. uvicorn workers).
+    Rows live in <dir>/vectors.f32 (raw float32, read through np.memmap) and line i of
+    <dir>/keys.jsonl holds the normalized text of row i. Writers take an flock on <dir>/.lock
+    and append the vectors before their keys, so a key is never visible before its row.
+    """
+
+    def __init__(self, directory, dim: int):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.dim = dim
+        self.row_bytes = 4 * dim
+        self.vectors_path = self.directory / "vectors.f32"
+        self.keys_path = self.directory / "keys.jsonl"
+        self.lock_path = self.directory / ".lock"
+        self._lock = threading.Lock()
+        self._matrix = None
+
+        # Rows read from keys.jsonl so far and the byte offset to resume from
+        self.index = {}
+        self._rows_read = 0
+        self._keys_offset = 0
+
+        with self._lock, self._file_lock():
+            self._migrate_json_index()
+            self._repair()
+            self._read_new_keys()
+
+    @contextmanager
+    def _file_lock(self):
+        """Exclusive lock across processes (a no-op where fcntl is unavailable)"""
+        if fcntl is None:
+            yield
+            return
+        with open(self.lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _vector_rows(self) -> int:
+        return self.vectors_path.stat().st_size // self.row_bytes if self.vectors_path.exists() else 0
+
+    def _migrate_json_index(self):
+        """Convert the index.json written by earlier versions into keys.jsonl"""
+        index_path = self.directory / "index.json"
+        if self.keys_path.exists() or not index_path.exists():
+            return
+        with open(index_path) as f:
+            old_index = json.load(f)
+        keys = [None] * self._vector_rows()
+        for text, row in old_index.items():
+            if row < len(keys):
+                keys[row] = text
+        with open(self.keys_path, "w") as f:
+            f.writelines(json.dumps(key) + "\n" for key in keys)
+        index_path.unlink()
+
+    def _repair(self):
+        """Trim the vectors and key log to the rows both of them have (after an interrupted write)"""
+        if not self.keys_path.exists():
+            self.keys_path.touch()
+        with open(self.keys_path, "rb") as f:
+            lines = f.read().split(b"\n")[:-1]
+        rows = min(len(lines), self._vector_rows())
+        if self.vectors_path.exists() and self.vectors_path.stat().st_size != rows * self.row_bytes:
+            os.truncate(self.vectors_path, rows * self.row_bytes)
+        if len(lines) != rows or self.keys_path.stat().st_size != sum(len(line) + 1 for line in lines):
+            os.truncate(self.keys_path, sum(len(line) + 1 for line in lines[:rows]))
+
+    def _read_new_keys(self):
+        """Pick up rows appended to keys.jsonl (by this or another process) since the last read"""
+        with open(self.keys_path, "rb") as f:
+            f.seek(self._keys_offset)
+            data = f.read()
+        complete = data.rfind(b"\n") + 1
+        for line in data[:complete].split(b"\n")[:-1]:
+            key = json.loads(line)
+            if key is not None:
+                self.index.setdefault(key, self._rows_read)
+            self._rows_read += 1
+        self._keys_offset += complete
+
+    def _rows(self):
+        if self._matrix is None or self._matrix.shape[0] < self._rows_read:
+            self._matrix = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(self._rows_read, self.dim))
+        return self._matrix
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            row = self.index.get(key)
+            if row is None:
+                self._read_new_keys()
+                row = self.index.get(key)
+                if row is None:
+                    return None
+            return np.array(self._rows()[row])
+
+    def put_many(self, keys: List[str], vectors: np.ndarray) -> None:
+        with self._lock, self._file_lock():
+            # Another process may have stored some of these (and moved the end of the file) already
+            self._read_new_keys()
+            new = {}
+            for key, vec in zip(keys, vectors):
+                if key not in self.index and key not in new:
+                    new[key] = vec
+            if not new:
+                return
+            if self._vector_rows() != self._rows_read:
+                self._repair()
+            with open(self.vectors_path, "ab") as f:
+                f.write(np.asarray(list(new.values()), dtype=np.float32).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            with open(self.keys_path, "a") as f:
+                f.writelines(json.dumps(key) + "\n" for key in new)
+            self._read_new_keys()
+
+
+class TorchEncoder:
+    """Mean-pooled MiniLM embeddings with the HuggingFace PyTorch model (eager fp32)"""
+
+    name = "torch"
+
+    def __init__(self, model_name: str = MODEL_NAME):
+        from transformers import AutoTokenizer, AutoModel
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.model = AutoModel.from_pretrained(model_name)
+        self.model.eval()
+        self.dim = self.model.config.hidden_size
+
+    def __call__(self, texts: List[str]) -> np.ndarray:
+        """One padded forward pass; padding is masked out of the mean so rows match unbatched output"""
+        import torch
+
+        tokens = self.tokenizer(texts, return_tensors="pt", truncation=True, padding=True)
+        with torch.no_grad():
+            output = self.model(**tokens)
+        mask = tokens["attention_mask"].unsqueeze(-1).to(output.last_hidden_state.dtype)
+        summed = (output.last_hidden_state * mask).sum(dim=1)
+        return (summed / mask.sum(dim=1).clamp(min=1)).numpy()
+
+
+class EmbeddingService:
+    """
+    Mean-pooled MiniLM embeddings with an in-memory LRU and optional disk store.
+    The encoder (TorchEncoder unless encoder_factory is given) is loaded on first use.
+    """
+
+    def __init__(
+        self,
+        model_name: str = MODEL_NAME,
+        cache_size: int = 4096,
+        store_dir: Optional[str] = None,
+        encoder_factory: Optional[Callable[[str], Any]] = None,
+    ):
+        self.model_name = model_name
+        self.cache_size = cache_size
+        self.store_dir = store_dir
+        self.encoder_factory = encoder_factory or TorchEncoder
+        self._cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._encoder = None
+        self._store = None
+
+    def load(self):
+        """Load the encoder (and open the disk store) if not already loaded"""
+        with self._load_lock:
+            if self._encoder is None:
+                encoder = self.encoder_factory(self.model_name)
+                if self.store_dir:
+                    # Other backends (e.g. quantized ONNX) get their own store so vectors never mix
+                    store_dir = self.store_dir if encoder.name == "torch" else os.path.join(self.store_dir, encoder.name)
+                    self._store = EmbeddingStore(store_dir, encoder.dim)
+                self._encoder = encoder
+        return self._encoder
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        return self.load()(texts)
+
+    def _cache_get(self, key: str) -> Optional[np.ndarray]:
+        with self._cache_lock:
+            vec = self._cache.get(key)
+            if vec is not None:
+                self._cache.move_to_end(key)
+            return vec
+
+    def _cache_put(self, key: str, vec: np.ndarray) -> None:
+        if self.cache_size <= 0:
+            return
+        with self._cache_lock:
+            self._cache[key] = vec
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def embed_batch(self, texts: Iterable[str]) -> np.ndarray:
+        """
+        Embeddings for texts, shape (len(texts), hidden_size).
+        Only texts missing from the LRU and disk store are run through the model, in one batch.
+        """
+        keys = [normalize_text(t) for t in texts]
+        found = {}
+        missing = []
+        missing_set = set()
+        for key in keys:
+            if key in found or key in missing_set:
+                continue
+            vec = self._cache_get(key)
+            if vec is None and self.store_dir:
+                self.load()
+                vec = self._store.get(key)
+                if vec is not None:
+                    self._cache_put(key, vec)
+            if vec is None:
+                missing.append(key)
+                missing_set.add(key)
+            else:
+                found[key] = vec
+
+        if missing:
+            vectors = self._encode(missing)
+            for key, vec in zip(missing, vectors):
+                found[key] = vec
+                self._cache_put(key, vec)
+            if self._store is not None:
+                self._store.put_many(missing, vectors)
+
+        if not keys:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.vstack([found[key] for key in keys])
+
+    def embed(self, text: str) -> np.ndarray:
+        """Embedding for a single text"""
+        return self.embed_batch([text])[0]
+
+
+_default_service = None
+_default_lock = threading.Lock()
+
+
+def get_embedding_service(encoder_factory: Optional[Callable[[str], Any]] = None) -> EmbeddingService:
+    """
+    Process-wide EmbeddingService configured from EMBEDDING_CACHE_SIZE and EMBEDDING_STORE_DIR.
+    encoder_factory only takes effect on the first call.
+    """
+    global _default_service
+    with _default_lock:
+        if _default_service is None:
+            _default_service = EmbeddingService(
+                cache_size=int(os.getenv("EMBEDDING_CACHE_SIZE", "4096")),
+                store_dir=os.getenv("EMBEDDING_STORE_DIR") or None,
+                encoder_factory=encoder_factory,
+            )
+    return _default_service
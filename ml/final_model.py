@@ -1,21 +1,14 @@
-from transformers import AutoTokenizer, AutoModel
 from sklearn.linear_model import Ridge
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import r2_score, mean_squared_error
-import torch, numpy as np, pandas as pd
+import numpy as np, pandas as pd
+from embedding_service import EmbeddingService
 
 df = pd.read_csv("ad_receptiveness.csv")
-tokenizer = AutoTokenizer.from_pretrained("sentence-transformers/all-MiniLM-L6-v2")
-embed_model = AutoModel.from_pretrained("sentence-transformers/all-MiniLM-L6-v2")
-
-def get_embedding(text):
-    tokens = tokenizer(text, return_tensors="pt", truncation=True, padding=True)
-    with torch.no_grad():
-        out = embed_model(**tokens)
-    return out.last_hidden_state.mean(dim=1).squeeze().numpy()
+embedding_service = EmbeddingService(store_dir="embedding_store")
 
 # Build feature matrix: [embedding + mean_sentiment]
-embeddings = np.vstack([get_embedding(t) for t in df["ad_text"]])
+embeddings = embedding_service.embed_batch(df["ad_text"])
 
 mean_sentiment = df["mean_sentiment"].to_numpy().reshape(-1, 1)
 X = np.hstack([embeddings, mean_sentiment])
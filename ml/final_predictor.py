@@ -1,23 +1,19 @@
 import emoji
 import joblib
+from embedding_service import EmbeddingService
 from textblob import TextBlob
-from transformers import AutoTokenizer, AutoModel, pipeline
-import torch
+from transformers import pipeline
 import numpy as np
 import pandas as pd
 
 # Load models
-tokenizer = AutoTokenizer.from_pretrained("sentence-transformers/all-MiniLM-L6-v2")
-embed_model = AutoModel.from_pretrained("sentence-transformers/all-MiniLM-L6-v2")
+embedding_service = EmbeddingService(store_dir="embedding_store")
 toxicity_model = pipeline("text-classification", model="unitary/toxic-bert")
 comment_sentiment_model = joblib.load("saved_models/comment_sentiment_model.pkl")
 ad_receptive_model = joblib.load("saved_models/ad_receptiveness_model.pkl")
 
 def get_features(text):
-    tokens = tokenizer(text, return_tensors="pt", truncation=True, padding=True)
-    with torch.no_grad():
-        output = embed_model(**tokens)
-    emb = output.last_hidden_state.mean(dim=1).squeeze().numpy()
+    emb = embedding_service.embed(text)
 
     sentiment_polarity = TextBlob(text).sentiment.polarity
     emoji_count = len(emoji.emoji_list(text))
@@ -55,10 +51,7 @@ print("Receptiveness Index:", round(receptiveness_index, 3))
 
 # 2. Predict ad-level receptiveness using ad text + mean sentiment
 def get_embedding(text):
-    tokens = tokenizer(text, return_tensors="pt", truncation=True, padding=True)
-    with torch.no_grad():
-        out = embed_model(**tokens)
-    return out.last_hidden_state.mean(dim=1).squeeze().numpy()
+    return embedding_service.embed(text)
 
 ad_emb = get_embedding(ad_text)
 X = np.hstack([ad_emb, [mean_sentiment]]).reshape(1, -1)
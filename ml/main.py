@@ -2,20 +2,19 @@ from sklearn.model_selection import train_test_split
 from textblob import TextBlob
 import emoji
 import pandas as pd
-from transformers import pipeline, AutoTokenizer, AutoModel
+from transformers import pipeline
 from sklearn.linear_model import LogisticRegression
 from sklearn.preprocessing import StandardScaler
 from sklearn.pipeline import make_pipeline
-import torch
 import numpy as np
 from pathlib import Path
 import joblib
 import os
+from embedding_service import EmbeddingService
 
 np.set_printoptions(suppress=True, precision=3)
 
-tokenizer = AutoTokenizer.from_pretrained("sentence-transformers/all-MiniLM-L6-v2")
-embed_model = AutoModel.from_pretrained("sentence-transformers/all-MiniLM-L6-v2")
+embedding_service = EmbeddingService(store_dir="embedding_store")
 toxicity_model = pipeline("text-classification", model="unitary/toxic-bert")
 
 comment_root = "datasets/comment_labels"
@@ -35,10 +34,7 @@ texts = dataset["text"]
 labels = dataset["label"]
 
 def get_embedding(text):
-    tokens = tokenizer(text, return_tensors="pt", truncation=True, padding=True)
-    with torch.no_grad():
-        output = embed_model(**tokens)
-    return output.last_hidden_state.mean(dim=1).squeeze().numpy()
+    return embedding_service.embed(text)
 # rows = []
 # for text in texts:
 #     emb = get_embedding(text)